@@ -5,6 +5,7 @@ import plotly.graph_objects as go
 from datetime import datetime, date, timedelta
 from session_manager import SessionManager
 import requests
+import tempfile
 
 def show_admin_dashboard():
     """Main admin dashboard with system overview"""
@@ -175,9 +176,8 @@ def show_user_management():
         st.subheader("All System Users")
         
         # Get all users
-        response = SessionManager.make_authenticated_request("/users/")
-        if response and response.status_code == 200:
-            users = response.json()
+        users = SessionManager.get_all_pages("/users/")
+        if users is not None:
             
             if users:
                 # Create comprehensive user table
@@ -232,9 +232,8 @@ def show_user_management():
         st.subheader("Teacher Management")
         
         # Get teachers
-        response = SessionManager.make_authenticated_request("/users/teachers")
-        if response and response.status_code == 200:
-            teachers = response.json()
+        teachers = SessionManager.get_all_pages("/users/teachers")
+        if teachers is not None:
             
             if teachers:
                 # Teacher details with class information
@@ -248,9 +247,8 @@ def show_user_management():
                             st.write(f"**Joined:** {teacher['created_at'][:10]}")
                             
                             # Get teacher's classes
-                            classes_response = SessionManager.make_authenticated_request("/classes/")
-                            if classes_response and classes_response.status_code == 200:
-                                all_classes = classes_response.json()
+                            all_classes = SessionManager.get_all_pages("/classes/")
+                            if all_classes is not None:
                                 teacher_classes = [c for c in all_classes if c['teacher_id'] == teacher['id']]
                                 
                                 if teacher_classes:
@@ -283,10 +281,9 @@ def show_user_management():
     with tab3:
         st.subheader("Student Management")
         
-        # Get students
-        response = SessionManager.make_authenticated_request("/users/students")
-        if response and response.status_code == 200:
-            students = response.json()
+        # Get students with their enrollment and attendance aggregates
+        students = SessionManager.get_all_pages("/users/students?include_stats=true")
+        if students is not None:
             
             if students:
                 # Student search and filter
@@ -314,14 +311,9 @@ def show_user_management():
                                     st.write(f"Status: {'Active' if student['is_active'] else 'Inactive'}")
                                     st.write(f"Joined: {student['created_at'][:10]}")
                                     
-                                    # Get student's enrollments
-                                    enrollments_response = SessionManager.make_authenticated_request(
-                                        f"/enrollments/student/{student['id']}"
-                                    )
-                                    
-                                    if enrollments_response and enrollments_response.status_code == 200:
-                                        enrollments = enrollments_response.json()
-                                        st.write(f"Enrolled Classes: {len(enrollments)}")
+                                    st.write(f"Enrolled Classes: {student['enrolled_class_count']}")
+                                    last_attendance = student['last_attendance_date']
+                                    st.write(f"Last Attendance: {last_attendance[:10] if last_attendance else 'Never'}")
                                     
                                     if student['is_active']:
                                         if st.button(f"Deactivate", key=f"deactivate_student_{student['id']}", type="secondary"):
@@ -347,9 +339,8 @@ def show_user_management():
         st.subheader("User Registration Trends")
         
         # Get all users for analysis
-        response = SessionManager.make_authenticated_request("/users/")
-        if response and response.status_code == 200:
-            users = response.json()
+        users = SessionManager.get_all_pages("/users/")
+        if users is not None:
             
             if users:
                 # Create DataFrame for analysis
@@ -411,10 +402,11 @@ def show_class_management():
     st.title("Class Management")
     st.markdown("---")
     
-    # Get all classes
-    response = SessionManager.make_authenticated_request("/classes/")
+    # Enrollment counts, attendance rates and teacher workload in one request
+    response = SessionManager.make_authenticated_request("/classes/overview")
     if response and response.status_code == 200:
-        classes = response.json()
+        overview = response.json()
+        classes = overview['classes']
         
         if classes:
             # Class overview table
@@ -422,18 +414,13 @@ def show_class_management():
             
             class_data = []
             for class_obj in classes:
-                # Get enrollment count
-                enrollments_response = SessionManager.make_authenticated_request(f"/enrollments/class/{class_obj['id']}")
-                enrollment_count = 0
-                if enrollments_response and enrollments_response.status_code == 200:
-                    enrollment_count = len(enrollments_response.json())
-                
                 class_data.append({
-                    "ID": class_obj['id'],
-                    "Class Name": class_obj['name'],
-                    "Teacher": class_obj['teacher']['full_name'],
-                    "Teacher Email": class_obj['teacher']['email'],
-                    "Students": enrollment_count,
+                    "ID": class_obj['class_id'],
+                    "Class Name": class_obj['class_name'],
+                    "Teacher": class_obj['teacher_name'],
+                    "Teacher Email": class_obj['teacher_email'],
+                    "Students": class_obj['enrollment_count'],
+                    "Attendance Rate": f"{class_obj['attendance_rate']:.1f}%" if class_obj['attendance_rate'] is not None else "N/A",
                     "Created": class_obj['created_at'][:10],
                     "Status": "Active" if class_obj['is_active'] else "Inactive"
                 })
@@ -475,24 +462,13 @@ def show_class_management():
             # Teacher workload analysis
             st.subheader("Teacher Workload Analysis")
             
-            teacher_workload = {}
-            for class_obj in classes:
-                teacher_name = class_obj['teacher']['full_name']
-                if teacher_name not in teacher_workload:
-                    teacher_workload[teacher_name] = {'classes': 0, 'students': 0}
-                teacher_workload[teacher_name]['classes'] += 1
-                
-                # Add student count
-                enrollments_response = SessionManager.make_authenticated_request(f"/enrollments/class/{class_obj['id']}")
-                if enrollments_response and enrollments_response.status_code == 200:
-                    teacher_workload[teacher_name]['students'] += len(enrollments_response.json())
-            
             workload_data = []
-            for teacher, data in teacher_workload.items():
+            for teacher in overview['teachers']:
                 workload_data.append({
-                    "Teacher": teacher,
-                    "Classes": data['classes'],
-                    "Total Students": data['students']
+                    "Teacher": teacher['teacher_name'],
+                    "Classes": teacher['class_count'],
+                    "Total Students": teacher['enrollment_count'],
+                    "Distinct Students": teacher['student_count']
                 })
             
             workload_df = pd.DataFrame(workload_data)
@@ -522,89 +498,76 @@ def show_system_reports():
         with col2:
             end_date = st.date_input("End Date", value=date.today())
         
-        # Get all classes for attendance analysis
-        classes_response = SessionManager.make_authenticated_request("/classes/")
-        if classes_response and classes_response.status_code == 200:
-            classes = classes_response.json()
+        # Aggregated server-side: one request per chart instead of one per class
+        params = f"?start_date={start_date}&end_date={end_date}"
+        daily_response = SessionManager.make_authenticated_request(f"/analytics/attendance/daily{params}")
+        class_response = SessionManager.make_authenticated_request(f"/analytics/attendance/by-class{params}")
+        
+        if daily_response and daily_response.status_code == 200 and class_response and class_response.status_code == 200:
+            daily_attendance = pd.DataFrame(daily_response.json())
+            class_rates = class_response.json()
             
-            if classes:
-                # Collect attendance data for all classes
-                all_attendance_data = []
+            if not daily_attendance.empty:
+                # Summary statistics
+                total_records = int(daily_attendance['total'].sum())
+                present_count = int(daily_attendance['present'].sum())
+                absent_count = int(daily_attendance['absent'].sum())
+                tardy_count = int(daily_attendance['tardy'].sum())
                 
-                for class_obj in classes:
-                    params = f"?start_date={start_date}&end_date={end_date}"
-                    attendance_response = SessionManager.make_authenticated_request(
-                        f"/attendance/class/{class_obj['id']}{params}"
-                    )
-                    
-                    if attendance_response and attendance_response.status_code == 200:
-                        attendance_records = attendance_response.json()
-                        
-                        for record in attendance_records:
-                            all_attendance_data.append({
-                                "Date": record['date'][:10],
-                                "Class": class_obj['name'],
-                                "Teacher": class_obj['teacher']['full_name'],
-                                "Student": record['student']['full_name'],
-                                "Status": record['status']
-                            })
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("Total Records", total_records)
+                with col2:
+                    st.metric("Present", present_count, delta=f"{(present_count/total_records*100):.1f}%")
+                with col3:
+                    st.metric("Absent", absent_count, delta=f"{(absent_count/total_records*100):.1f}%")
+                with col4:
+                    st.metric("Tardy", tardy_count, delta=f"{(tardy_count/total_records*100):.1f}%")
                 
-                if all_attendance_data:
-                    df = pd.DataFrame(all_attendance_data)
-                    
-                    # Summary statistics
-                    total_records = len(df)
-                    present_count = len(df[df['Status'] == 'present'])
-                    absent_count = len(df[df['Status'] == 'absent'])
-                    tardy_count = len(df[df['Status'] == 'tardy'])
-                    
-                    col1, col2, col3, col4 = st.columns(4)
-                    with col1:
-                        st.metric("Total Records", total_records)
-                    with col2:
-                        st.metric("Present", present_count, delta=f"{(present_count/total_records*100):.1f}%")
-                    with col3:
-                        st.metric("Absent", absent_count, delta=f"{(absent_count/total_records*100):.1f}%")
-                    with col4:
-                        st.metric("Tardy", tardy_count, delta=f"{(tardy_count/total_records*100):.1f}%")
-                    
-                    # Daily attendance trend
-                    daily_attendance = df.groupby(['Date', 'Status']).size().unstack(fill_value=0)
-                    
-                    fig_daily = px.line(
-                        daily_attendance.reset_index(),
-                        x='Date',
-                        y=['present', 'absent', 'tardy'],
-                        title="Daily Attendance Trends",
-                        color_discrete_map={
-                            'present': '#2E8B57',
-                            'absent': '#DC143C',
-                            'tardy': '#FF8C00'
-                        }
-                    )
-                    
-                    st.plotly_chart(fig_daily, use_container_width=True)
-                    
-                    # Class-wise attendance rates
-                    class_attendance = df.groupby(['Class', 'Status']).size().unstack(fill_value=0)
-                    class_attendance['Total'] = class_attendance.sum(axis=1)
-                    class_attendance['Attendance Rate'] = (class_attendance.get('present', 0) / class_attendance['Total'] * 100).round(1)
-                    
-                    st.subheader("Class-wise Attendance Rates")
-                    st.dataframe(class_attendance, use_container_width=True)
-                else:
-                    st.info("No attendance data found for the selected period.")
+                # Daily attendance trend
+                fig_daily = px.line(
+                    daily_attendance.rename(columns={'date': 'Date'}),
+                    x='Date',
+                    y=['present', 'absent', 'tardy'],
+                    title="Daily Attendance Trends",
+                    color_discrete_map={
+                        'present': '#2E8B57',
+                        'absent': '#DC143C',
+                        'tardy': '#FF8C00'
+                    }
+                )
+                
+                st.plotly_chart(fig_daily, use_container_width=True)
+                
+                # Class-wise attendance rates
+                class_attendance = pd.DataFrame([
+                    {
+                        "Class": row['class_name'],
+                        "Teacher": row['teacher_name'],
+                        "present": row['present'],
+                        "absent": row['absent'],
+                        "tardy": row['tardy'],
+                        "Total": row['total'],
+                        "Attendance Rate": row['attendance_rate']
+                    }
+                    for row in class_rates
+                ]).set_index("Class")
+                
+                st.subheader("Class-wise Attendance Rates")
+                st.dataframe(class_attendance, use_container_width=True)
+            else:
+                st.info("No attendance data found for the selected period.")
+        else:
+            st.error("Failed to load attendance reports")
     
     with tab2:
         st.subheader("Performance Reports")
         
         # Get all users for performance analysis
-        users_response = SessionManager.make_authenticated_request("/users/")
-        classes_response = SessionManager.make_authenticated_request("/classes/")
+        users = SessionManager.get_all_pages("/users/")
+        classes = SessionManager.get_all_pages("/classes/")
         
-        if users_response and users_response.status_code == 200 and classes_response and classes_response.status_code == 200:
-            users = users_response.json()
-            classes = classes_response.json()
+        if users is not None and classes is not None:
             
             # Performance metrics
             col1, col2, col3 = st.columns(3)
@@ -683,9 +646,8 @@ def show_system_reports():
         
         with col1:
             if st.button("Export User Data", type="primary"):
-                users_response = SessionManager.make_authenticated_request("/users/")
-                if users_response and users_response.status_code == 200:
-                    users = users_response.json()
+                users = SessionManager.get_all_pages("/users/")
+                if users is not None:
                     user_df = pd.DataFrame(users)
                     csv = user_df.to_csv(index=False)
                     st.download_button(
@@ -697,9 +659,8 @@ def show_system_reports():
         
         with col2:
             if st.button("Export Class Data", type="primary"):
-                classes_response = SessionManager.make_authenticated_request("/classes/")
-                if classes_response and classes_response.status_code == 200:
-                    classes = classes_response.json()
+                classes = SessionManager.get_all_pages("/classes/")
+                if classes is not None:
                     class_df = pd.DataFrame(classes)
                     csv = class_df.to_csv(index=False)
                     st.download_button(
@@ -708,6 +669,31 @@ def show_system_reports():
                         file_name=f"classes_export_{date.today()}.csv",
                         mime="text/csv"
                     )
+        
+        st.markdown("---")
+        st.write("**Attendance Records**")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            export_start = st.date_input("From", value=date.today() - timedelta(days=365), key="export_start")
+        with col2:
+            export_end = st.date_input("To", value=date.today(), key="export_end")
+        with col3:
+            export_format = st.selectbox("Format", ["csv", "ndjson"], key="export_format")
+        
+        if st.button("Export Attendance Data", type="primary"):
+            # The API streams the export; spool it to disk instead of building it in memory
+            export_file = tempfile.TemporaryFile()
+            params = f"?format={export_format}&start_date={export_start}&end_date={export_end}"
+            if SessionManager.download(f"/exports/attendance{params}", export_file):
+                st.download_button(
+                    label=f"Download Attendance {export_format.upper()}",
+                    data=export_file,
+                    file_name=f"attendance_export_{date.today()}.{export_format}",
+                    mime="text/csv" if export_format == "csv" else "application/x-ndjson"
+                )
+            else:
+                st.error("Failed to export attendance data.")
 
 def show_platform_analytics():
     """Advanced platform analytics"""
@@ -717,13 +703,11 @@ def show_platform_analytics():
     st.markdown("---")
     
     # Get comprehensive data
-    users_response = SessionManager.make_authenticated_request("/users/")
-    classes_response = SessionManager.make_authenticated_request("/classes/")
+    users = SessionManager.get_all_pages("/users/")
+    classes = SessionManager.get_all_pages("/classes/")
     stats_response = SessionManager.make_authenticated_request("/dashboard/stats")
     
-    if all(r and r.status_code == 200 for r in [users_response, classes_response, stats_response]):
-        users = users_response.json()
-        classes = classes_response.json()
+    if users is not None and classes is not None and stats_response and stats_response.status_code == 200:
         stats = stats_response.json()
         
         # Key Performance Indicators
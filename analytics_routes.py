@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Date, func, select, case
+from typing import List, Optional
+from datetime import date, timedelta
+from database import get_read_db
+from models import Attendance, AttendanceStatus, Class, User, UserRole
+from schemas import DailyAttendance, ClassAttendanceRate
+from auth import require_teacher_or_admin, Principal
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+def status_count_columns():
+    """Per-status record counts plus the total, for a grouped attendance query"""
+    return (
+        func.count(case((Attendance.status == AttendanceStatus.PRESENT, 1))).label("present"),
+        func.count(case((Attendance.status == AttendanceStatus.ABSENT, 1))).label("absent"),
+        func.count(case((Attendance.status == AttendanceStatus.TARDY, 1))).label("tardy"),
+        func.count(Attendance.id).label("total"),
+    )
+
+def filter_attendance(query, current_user: Principal, start_date: Optional[date], end_date: Optional[date],
+                      class_id: Optional[int] = None):
+    """Restrict an attendance query joined to classes by date range, class and teacher ownership"""
+    if current_user.role == UserRole.TEACHER:
+        query = query.where(Class.teacher_id == current_user.id)
+    if class_id:
+        query = query.where(Attendance.class_id == class_id)
+    if start_date:
+        query = query.where(Attendance.date >= start_date)
+    if end_date:
+        # Inclusive of every record taken on end_date
+        query = query.where(Attendance.date < end_date + timedelta(days=1))
+    return query
+
+@router.get("/attendance/daily", response_model=List[DailyAttendance])
+async def get_daily_attendance(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    class_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(require_teacher_or_admin)
+):
+    """Attendance counts per day and status (teachers get their own classes only)"""
+    day = func.date(Attendance.date, type_=Date)
+    query = (
+        select(day.label("date"), *status_count_columns())
+        .join(Class, Attendance.class_id == Class.id)
+        .group_by(day)
+        .order_by(day)
+    )
+    query = filter_attendance(query, current_user, start_date, end_date, class_id)
+    result = await db.execute(query)
+    return [row._asdict() for row in result.all()]
+
+@router.get("/attendance/by-class", response_model=List[ClassAttendanceRate])
+async def get_attendance_by_class(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(require_teacher_or_admin)
+):
+    """Attendance counts and present rate per class over a date range (teachers get their own classes only)"""
+    query = (
+        select(
+            Class.id.label("class_id"),
+            Class.name.label("class_name"),
+            User.full_name.label("teacher_name"),
+            *status_count_columns()
+        )
+        .join(Class, Attendance.class_id == Class.id)
+        .join(User, Class.teacher_id == User.id)
+        .group_by(Class.id, Class.name, User.full_name)
+        .order_by(Class.name, Class.id)
+    )
+    query = filter_attendance(query, current_user, start_date, end_date)
+    result = await db.execute(query)
+    return [
+        {**row._asdict(), "attendance_rate": round(row.present / row.total * 100, 1) if row.total else 0.0}
+        for row in result.all()
+    ]
@@ -1,24 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import Date, func
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from collections import defaultdict
 from typing import List, Optional
-from datetime import datetime, date
-from database import get_db
-from models import Attendance, User, Class, Enrollment, UserRole, AttendanceStatus
-from schemas import AttendanceCreate, AttendanceUpdate, Attendance as AttendanceSchema
-from auth import get_current_active_user, require_teacher_or_admin
+from datetime import datetime, date, timedelta
+from database import get_db, get_read_db
+from models import Attendance, Class, Enrollment, UserRole
+from schemas import (
+    AttendanceCreate, AttendanceUpdate, Attendance as AttendanceSchema,
+    AttendanceBulkCreate, AttendanceBulkResponse
+)
+from auth import get_current_active_user, require_teacher_or_admin, Principal
+from attendance_summary import new_deltas, record_status_change, apply_summary_deltas, update_attendance_summary
+from cache import invalidate_dashboard_stats
+from loaders import ATTENDANCE_LIST_OPTIONS, ATTENDANCE_DETAIL_OPTIONS, ATTENDANCE_EXPANSIONS, list_options
+from pagination import PageParams, page_params, paginate
+from sparse import SPARSE_RESPONSES, ATTENDANCE_RESOURCE, FieldSelection, field_selection, sparse_response
 
 router = APIRouter(prefix="/attendance", tags=["attendance"])
 
+def same_day(moment: datetime) -> tuple:
+    """Conditions matching attendance taken on the same calendar day as moment"""
+    day_start = datetime.combine(moment.date(), datetime.min.time())
+    return (Attendance.date >= day_start, Attendance.date < day_start + timedelta(days=1))
+
+async def lock_attendance(db: AsyncSession, attendance_id: int) -> Optional[Attendance]:
+    """Load an attendance record under a row lock, so concurrent edits cannot both apply
+    a summary transition from the same old status"""
+    result = await db.execute(
+        select(Attendance)
+        .where(Attendance.id == attendance_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+async def load_attendance(db: AsyncSession, attendance_id: int) -> Optional[Attendance]:
+    """Load an attendance record with the relationships needed for its response"""
+    result = await db.execute(
+        select(Attendance)
+        .options(*ATTENDANCE_DETAIL_OPTIONS)
+        .where(Attendance.id == attendance_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
 @router.post("/", response_model=AttendanceSchema)
 async def mark_attendance(
     attendance_data: AttendanceCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_teacher_or_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_teacher_or_admin)
 ):
     """Mark attendance for a student"""
     # Verify class exists and teacher has access
-    class_obj = db.query(Class).filter(Class.id == attendance_data.class_id).first()
+    class_obj = await db.get(Class, attendance_data.class_id)
     if not class_obj:
         raise HTTPException(status_code=404, detail="Class not found")
     
@@ -26,32 +61,45 @@ async def mark_attendance(
         raise HTTPException(status_code=403, detail="Access denied")
     
     # Verify student is enrolled
-    enrollment = db.query(Enrollment).filter(
+    result = await db.execute(select(Enrollment).where(
         Enrollment.student_id == attendance_data.student_id,
         Enrollment.class_id == attendance_data.class_id,
         Enrollment.is_active == True
-    ).first()
+    ))
+    enrollment = result.scalars().first()
     
     if not enrollment:
         raise HTTPException(status_code=400, detail="Student not enrolled in this class")
     
-    # Check if attendance already exists for this date
-    existing_attendance = db.query(Attendance).filter(
-        Attendance.student_id == attendance_data.student_id,
-        Attendance.class_id == attendance_data.class_id,
-        func.date(Attendance.date) == attendance_data.date
-    ).first()
+    # Check if attendance already exists for this calendar day
+    result = await db.execute(
+        select(Attendance)
+        .where(
+            Attendance.student_id == attendance_data.student_id,
+            Attendance.class_id == attendance_data.class_id,
+            *same_day(attendance_data.date)
+        )
+        .order_by(Attendance.id)
+        .limit(1)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    existing_attendance = result.scalars().first()
     
     if existing_attendance:
-        # Update existing attendance
+        # Update the earliest record for the day; any later duplicates are left as they are
+        await update_attendance_summary(
+            db, existing_attendance.class_id, existing_attendance.student_id,
+            existing_attendance.status, attendance_data.status
+        )
         existing_attendance.status = attendance_data.status
         existing_attendance.grade = attendance_data.grade
         existing_attendance.notes = attendance_data.notes
         existing_attendance.marked_by = current_user.id
         
-        db.commit()
-        db.refresh(existing_attendance)
-        return existing_attendance
+        await db.commit()
+        invalidate_dashboard_stats(class_ids=[attendance_data.class_id])
+        return await load_attendance(db, existing_attendance.id)
     else:
         # Create new attendance record
         new_attendance = Attendance(
@@ -65,22 +113,131 @@ async def mark_attendance(
         )
         
         db.add(new_attendance)
-        db.commit()
-        db.refresh(new_attendance)
+        await update_attendance_summary(
+            db, attendance_data.class_id, attendance_data.student_id, None, attendance_data.status
+        )
+        await db.commit()
+        invalidate_dashboard_stats(class_ids=[attendance_data.class_id])
+        
+        return await load_attendance(db, new_attendance.id)
+
+@router.post("/bulk", response_model=AttendanceBulkResponse)
+async def mark_attendance_bulk(
+    bulk_data: AttendanceBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_teacher_or_admin)
+):
+    """Mark attendance for a whole class on one date in a single transaction"""
+    class_obj = await db.get(Class, bulk_data.class_id)
+    if not class_obj:
+        raise HTTPException(status_code=404, detail="Class not found")
+    
+    if current_user.role == UserRole.TEACHER and class_obj.teacher_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    student_ids = {record.student_id for record in bulk_data.records}
+    
+    # One set query for enrollment instead of one lookup per student
+    result = await db.execute(select(Enrollment.student_id).where(
+        Enrollment.class_id == bulk_data.class_id,
+        Enrollment.student_id.in_(student_ids),
+        Enrollment.is_active == True
+    ))
+    enrolled_ids = set(result.scalars().all())
+    
+    # Existing records for the same calendar day are updated rather than duplicated
+    result = await db.execute(
+        select(Attendance)
+        .where(
+            Attendance.class_id == bulk_data.class_id,
+            Attendance.student_id.in_(enrolled_ids),
+            *same_day(bulk_data.date)
+        )
+        .order_by(Attendance.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    existing = {}
+    other_same_day = defaultdict(int)
+    for attendance in result.scalars().all():
+        # The earliest record per student is updated; later duplicates are reported, not touched
+        if attendance.student_id in existing:
+            other_same_day[attendance.student_id] += 1
+        else:
+            existing[attendance.student_id] = attendance
+    
+    outcomes = []
+    seen = set()
+    deltas = new_deltas()
+    for record in bulk_data.records:
+        if record.student_id in seen:
+            outcomes.append((record.student_id, "error", None, "Duplicate row for student"))
+            continue
+        seen.add(record.student_id)
+        
+        if record.student_id not in enrolled_ids:
+            outcomes.append((record.student_id, "error", None, "Student not enrolled in this class"))
+            continue
         
-        return new_attendance
+        detail = None
+        attendance = existing.get(record.student_id)
+        if attendance:
+            outcome = "updated"
+            if other_same_day[record.student_id]:
+                detail = f"{other_same_day[record.student_id]} other record(s) for this day left unchanged"
+            record_status_change(deltas, bulk_data.class_id, record.student_id, attendance.status, record.status)
+        else:
+            outcome = "created"
+            attendance = Attendance(
+                student_id=record.student_id,
+                class_id=bulk_data.class_id,
+                date=bulk_data.date
+            )
+            db.add(attendance)
+            record_status_change(deltas, bulk_data.class_id, record.student_id, None, record.status)
+        
+        attendance.status = record.status
+        attendance.grade = record.grade
+        attendance.notes = record.notes
+        attendance.marked_by = current_user.id
+        outcomes.append((record.student_id, outcome, attendance, detail))
+    
+    await apply_summary_deltas(db, deltas)
+    await db.commit()
+    invalidate_dashboard_stats(class_ids=[bulk_data.class_id])
+    
+    results = [
+        {
+            "student_id": student_id,
+            "outcome": outcome,
+            "attendance_id": attendance.id if attendance is not None else None,
+            "detail": detail
+        }
+        for student_id, outcome, attendance, detail in outcomes
+    ]
+    return {
+        "class_id": bulk_data.class_id,
+        "date": bulk_data.date,
+        "created": sum(1 for r in results if r["outcome"] == "created"),
+        "updated": sum(1 for r in results if r["outcome"] == "updated"),
+        "failed": sum(1 for r in results if r["outcome"] == "error"),
+        "results": results
+    }
 
-@router.get("/class/{class_id}", response_model=List[AttendanceSchema])
+@router.get("/class/{class_id}", response_model=List[AttendanceSchema], responses=SPARSE_RESPONSES)
 async def get_class_attendance(
     class_id: int,
+    response: Response,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    page: PageParams = Depends(page_params),
+    selection: FieldSelection = Depends(field_selection(ATTENDANCE_RESOURCE)),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    """Get attendance records for a class"""
+    """Get attendance records for a class, paginated by date; the schema applies only without fields/expand, which return a sparse {data, included} envelope"""
     # Verify class exists and check permissions
-    class_obj = db.query(Class).filter(Class.id == class_id).first()
+    class_obj = await db.get(Class, class_id)
     if not class_obj:
         raise HTTPException(status_code=404, detail="Class not found")
     
@@ -88,111 +245,124 @@ async def get_class_attendance(
         raise HTTPException(status_code=403, detail="Access denied")
     elif current_user.role == UserRole.STUDENT:
         # Students can only see their own attendance
-        enrollment = db.query(Enrollment).filter(
+        result = await db.execute(select(Enrollment).where(
             Enrollment.student_id == current_user.id,
             Enrollment.class_id == class_id,
             Enrollment.is_active == True
-        ).first()
+        ))
+        enrollment = result.scalars().first()
         if not enrollment:
             raise HTTPException(status_code=403, detail="Access denied")
     
-    query = db.query(Attendance).filter(Attendance.class_id == class_id)
+    query = select(Attendance).options(*list_options(ATTENDANCE_LIST_OPTIONS, ATTENDANCE_EXPANSIONS, selection)).where(Attendance.class_id == class_id)
     
     # Filter by student if student role
     if current_user.role == UserRole.STUDENT:
-        query = query.filter(Attendance.student_id == current_user.id)
+        query = query.where(Attendance.student_id == current_user.id)
     
     # Apply date filters
     if start_date:
-        query = query.filter(Attendance.date >= start_date)
+        query = query.where(Attendance.date >= start_date)
     if end_date:
-        query = query.filter(Attendance.date <= end_date)
+        query = query.where(Attendance.date <= end_date)
     
-    attendance_records = query.all()
-    return attendance_records
+    records = await paginate(db, query, (Attendance.date, Attendance.id), page, response)
+    if selection.sparse:
+        return sparse_response(records, selection, ATTENDANCE_RESOURCE, response)
+    return records
 
-@router.get("/student/{student_id}", response_model=List[AttendanceSchema])
+@router.get("/student/{student_id}", response_model=List[AttendanceSchema], responses=SPARSE_RESPONSES)
 async def get_student_attendance(
     student_id: int,
+    response: Response,
     class_id: Optional[int] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    page: PageParams = Depends(page_params),
+    selection: FieldSelection = Depends(field_selection(ATTENDANCE_RESOURCE)),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    """Get attendance records for a student"""
+    """Get attendance records for a student, paginated by date; the schema applies only without fields/expand, which return a sparse {data, included} envelope"""
     # Check permissions
     if current_user.role == UserRole.STUDENT and current_user.id != student_id:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    query = db.query(Attendance).filter(Attendance.student_id == student_id)
+    query = select(Attendance).options(*list_options(ATTENDANCE_LIST_OPTIONS, ATTENDANCE_EXPANSIONS, selection)).where(Attendance.student_id == student_id)
     
     # Filter by class if specified
     if class_id:
-        query = query.filter(Attendance.class_id == class_id)
+        query = query.where(Attendance.class_id == class_id)
         
         # Additional permission check for teachers
         if current_user.role == UserRole.TEACHER:
-            class_obj = db.query(Class).filter(Class.id == class_id).first()
+            class_obj = await db.get(Class, class_id)
             if class_obj and class_obj.teacher_id != current_user.id:
                 raise HTTPException(status_code=403, detail="Access denied")
     
     # Apply date filters
     if start_date:
-        query = query.filter(Attendance.date >= start_date)
+        query = query.where(Attendance.date >= start_date)
     if end_date:
-        query = query.filter(Attendance.date <= end_date)
+        query = query.where(Attendance.date <= end_date)
     
-    attendance_records = query.all()
-    return attendance_records
+    records = await paginate(db, query, (Attendance.date, Attendance.id), page, response)
+    if selection.sparse:
+        return sparse_response(records, selection, ATTENDANCE_RESOURCE, response)
+    return records
 
 @router.put("/{attendance_id}", response_model=AttendanceSchema)
 async def update_attendance(
     attendance_id: int,
     attendance_data: AttendanceUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_teacher_or_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_teacher_or_admin)
 ):
     """Update attendance record"""
-    attendance = db.query(Attendance).filter(Attendance.id == attendance_id).first()
+    attendance = await lock_attendance(db, attendance_id)
     if not attendance:
         raise HTTPException(status_code=404, detail="Attendance record not found")
     
     # Check permissions for teachers
     if current_user.role == UserRole.TEACHER:
-        class_obj = db.query(Class).filter(Class.id == attendance.class_id).first()
+        class_obj = await db.get(Class, attendance.class_id)
         if class_obj.teacher_id != current_user.id:
             raise HTTPException(status_code=403, detail="Access denied")
     
     # Update fields
+    await update_attendance_summary(
+        db, attendance.class_id, attendance.student_id, attendance.status, attendance_data.status
+    )
     attendance.status = attendance_data.status
     attendance.grade = attendance_data.grade
     attendance.notes = attendance_data.notes
     attendance.marked_by = current_user.id
     
-    db.commit()
-    db.refresh(attendance)
+    await db.commit()
+    invalidate_dashboard_stats(class_ids=[attendance.class_id])
     
-    return attendance
+    return await load_attendance(db, attendance.id)
 
 @router.delete("/{attendance_id}")
 async def delete_attendance(
     attendance_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_teacher_or_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_teacher_or_admin)
 ):
     """Delete attendance record"""
-    attendance = db.query(Attendance).filter(Attendance.id == attendance_id).first()
+    attendance = await lock_attendance(db, attendance_id)
     if not attendance:
         raise HTTPException(status_code=404, detail="Attendance record not found")
     
     # Check permissions for teachers
     if current_user.role == UserRole.TEACHER:
-        class_obj = db.query(Class).filter(Class.id == attendance.class_id).first()
+        class_obj = await db.get(Class, attendance.class_id)
         if class_obj.teacher_id != current_user.id:
             raise HTTPException(status_code=403, detail="Access denied")
     
-    db.delete(attendance)
-    db.commit()
+    await update_attendance_summary(db, attendance.class_id, attendance.student_id, attendance.status, None)
+    await db.delete(attendance)
+    await db.commit()
+    invalidate_dashboard_stats(class_ids=[attendance.class_id])
     
     return {"message": "Attendance record deleted successfully"}
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Attendance summary maintenance for LMS
+Keeps the attendance_summary counters in step with attendance writes and
+rebuilds or checks them against the raw attendance rows
+
+Usage: python attendance_summary.py --check | --rebuild [--batch-size N]
+"""
+
+import argparse
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Attendance, AttendanceStatus, AttendanceSummary, Class
+
+STATUS_COLUMNS = {
+    AttendanceStatus.PRESENT: "present_count",
+    AttendanceStatus.ABSENT: "absent_count",
+    AttendanceStatus.TARDY: "tardy_count",
+}
+COUNT_COLUMNS = tuple(STATUS_COLUMNS.values())
+
+# (class_id, student_id) -> {counter column: delta}
+SummaryDeltas = Dict[Tuple[int, int], Dict[str, int]]
+
+def new_deltas() -> SummaryDeltas:
+    return defaultdict(lambda: dict.fromkeys(COUNT_COLUMNS, 0))
+
+def record_status_change(deltas: SummaryDeltas, class_id: int, student_id: int,
+                         old_status: Optional[AttendanceStatus], new_status: Optional[AttendanceStatus]):
+    """Record a created (old_status None), updated or deleted (new_status None) attendance record"""
+    if old_status == new_status:
+        return
+    counters = deltas[(class_id, student_id)]
+    if old_status is not None:
+        counters[STATUS_COLUMNS[old_status]] -= 1
+    if new_status is not None:
+        counters[STATUS_COLUMNS[new_status]] += 1
+
+async def apply_summary_deltas(db: AsyncSession, deltas: SummaryDeltas):
+    """Add the deltas to the summary rows inside the caller's transaction"""
+    rows = [
+        {"class_id": class_id, "student_id": student_id, "updated_at": datetime.utcnow(), **counters}
+        for (class_id, student_id), counters in deltas.items()
+        if any(counters.values())
+    ]
+    if not rows:
+        return
+
+    table = AttendanceSummary.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        # Atomic upsert so concurrent writers increment rather than overwrite each other
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = dialect_insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.class_id, table.c.student_id],
+            set_={
+                **{column: table.c[column] + stmt.excluded[column] for column in COUNT_COLUMNS},
+                "updated_at": stmt.excluded.updated_at,
+            }
+        )
+        await db.execute(stmt)
+        return
+
+    for row in rows:
+        result = await db.execute(
+            update(table)
+            .where(table.c.class_id == row["class_id"], table.c.student_id == row["student_id"])
+            .values(updated_at=row["updated_at"], **{c: table.c[c] + row[c] for c in COUNT_COLUMNS})
+        )
+        if result.rowcount == 0:
+            await db.execute(insert(table).values(row))
+
+async def update_attendance_summary(db: AsyncSession, class_id: int, student_id: int,
+                                    old_status: Optional[AttendanceStatus],
+                                    new_status: Optional[AttendanceStatus]):
+    """Apply a single attendance status change to the summary"""
+    deltas = new_deltas()
+    record_status_change(deltas, class_id, student_id, old_status, new_status)
+    await apply_summary_deltas(db, deltas)
+
+def summary_count_columns():
+    """Total plus per-status sums over attendance_summary"""
+    present = func.coalesce(func.sum(AttendanceSummary.present_count), 0)
+    absent = func.coalesce(func.sum(AttendanceSummary.absent_count), 0)
+    tardy = func.coalesce(func.sum(AttendanceSummary.tardy_count), 0)
+    return (
+        (present + absent + tardy).label("total"),
+        present.label("present"),
+        absent.label("absent"),
+        tardy.label("tardy"),
+    )
+
+def raw_summary_query():
+    """Counters recomputed from the raw attendance rows"""
+    return select(
+        Attendance.class_id,
+        Attendance.student_id,
+        *[
+            func.count(case((Attendance.status == status, 1))).label(column)
+            for status, column in STATUS_COLUMNS.items()
+        ]
+    ).group_by(Attendance.class_id, Attendance.student_id)
+
+def rebuild_class_range(conn, low: int, high: int):
+    """Replace summary rows for class ids in [low, high) with counts from the raw rows"""
+    conn.execute(delete(AttendanceSummary).where(
+        AttendanceSummary.class_id >= low, AttendanceSummary.class_id < high
+    ))
+    raw = raw_summary_query().where(Attendance.class_id >= low, Attendance.class_id < high).subquery()
+    conn.execute(insert(AttendanceSummary).from_select(
+        ["class_id", "student_id", *COUNT_COLUMNS],
+        select(raw.c.class_id, raw.c.student_id, *[raw.c[c] for c in COUNT_COLUMNS])
+    ))
+
+def find_drift(conn) -> list:
+    """Summary rows whose counters differ from the raw attendance rows"""
+    raw = {(r.class_id, r.student_id): tuple(r[2:]) for r in conn.execute(raw_summary_query())}
+    stored = {
+        (r.class_id, r.student_id): (r.present_count, r.absent_count, r.tardy_count)
+        for r in conn.execute(select(AttendanceSummary))
+    }
+    drift = []
+    for key in sorted(set(raw) | set(stored)):
+        expected = raw.get(key, (0, 0, 0))
+        actual = stored.get(key, (0, 0, 0))
+        if expected != actual:
+            drift.append({"class_id": key[0], "student_id": key[1], "expected": expected, "actual": actual})
+    return drift
+
+def main():
+    from database import engine
+    from migrations import DEFAULT_BATCH_SIZE, MigrationContext
+
+    parser = argparse.ArgumentParser(description="Check or rebuild the attendance summary table")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--check", action="store_true", help="report drift without changing anything")
+    action.add_argument("--rebuild", action="store_true", help="recompute all counters from attendance rows")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="class ids per rebuild batch")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        MigrationContext(engine, args.batch_size).backfill("attendance_summary", Class.id, rebuild_class_range)
+        print("✓ Attendance summary rebuilt")
+
+    with engine.connect() as conn:
+        drift = find_drift(conn)
+    for row in drift:
+        print(f"✗ class {row['class_id']} student {row['student_id']}: "
+              f"expected {row['expected']} (present, absent, tardy), found {row['actual']}")
+    print(f"{len(drift)} summary row(s) out of step with attendance records")
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,27 @@
+import hashlib
+import os
+import secrets
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from database import get_db, verify_password
-from models import User, UserRole
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db
+from models import User, UserRole, RefreshToken
 from schemas import UserLogin
+from cache import principal_cache, token_cache
+from password_hashing import verify_and_update_password
 
 # JWT Configuration
 SECRET_KEY = "your-secret-key-change-in-production"  # Change this in production
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Access tokens are short-lived; clients renew them with a rotating refresh token
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("LMS_ACCESS_TOKEN_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("LMS_REFRESH_TOKEN_DAYS", "14"))
 
 security = HTTPBearer()
 
@@ -27,12 +37,12 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> dict:
-    """Verify JWT token and return payload"""
+def decode_token(token: str) -> dict:
+    """Verify the signature and expiry of a JWT and return its claims"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: int = payload.get("sub")
-        if user_id is None:
+        if user_id is None or "exp" not in payload:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication credentials",
@@ -46,25 +56,116 @@ def verify_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+def verify_token(token: str) -> dict:
+    """Verify JWT token and return payload, reusing the claims of recently verified tokens"""
+    digest = token_digest(token)
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return payload
+    
+    payload = decode_token(token)
+    # Entries expire with the token itself, so a cache hit is never an expired token
+    remaining = payload["exp"] - time.time()
+    token_cache.set(digest, payload, ttl=min(remaining, token_cache.ttl))
+    return payload
+
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
     """Authenticate user with email and password"""
-    user = db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    verified, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        # Stored hash used a different bcrypt cost factor; upgrade it transparently
+        user.hashed_password = new_hash
+        await db.commit()
     return user
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
-    token = credentials.credentials
-    payload = verify_token(token)
-    user_id = payload.get("sub")
+def refresh_token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def issue_refresh_token(db: AsyncSession, user_id: int, family_id: Optional[str] = None) -> str:
+    """Add a new refresh token to the session (the caller commits); rotation keeps the family"""
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=refresh_token_digest(token),
+        family_id=family_id or secrets.token_hex(16),
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    return token
+
+async def purge_expired_refresh_tokens(db: AsyncSession, user_id: int):
+    """Drop a user's expired refresh tokens so the store only grows with live sessions"""
+    await db.execute(
+        delete(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.expires_at < datetime.utcnow())
+    )
+
+async def revoke_refresh_family(db: AsyncSession, family_id: str):
+    """Revoke every live token descended from the same login"""
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+
+async def find_refresh_token(db: AsyncSession, token: str) -> Optional[RefreshToken]:
+    result = await db.execute(select(RefreshToken).where(RefreshToken.token_hash == refresh_token_digest(token)))
+    return result.scalars().first()
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> Tuple[User, str]:
+    """Exchange a refresh token for its successor; replaying a used token revokes its whole family"""
+    now = datetime.utcnow()
+    stored = await find_refresh_token(db, token)
+    if stored is None or stored.expires_at <= now:
+        raise invalid_refresh_token()
+    
+    # Conditional update, so two concurrent refreshes cannot both rotate the same token
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == stored.id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        # Already rotated or revoked: treat as stolen and end the session everywhere
+        await revoke_refresh_family(db, stored.family_id)
+        await db.commit()
+        raise invalid_refresh_token()
+    
+    user = await db.get(User, stored.user_id)
+    if user is None or not user.is_active:
+        await revoke_refresh_family(db, stored.family_id)
+        await db.commit()
+        raise invalid_refresh_token()
     
-    user = db.query(User).filter(User.id == user_id).first()
+    new_token = issue_refresh_token(db, user.id, stored.family_id)
+    await db.commit()
+    return user, new_token
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller as seen by permission checks"""
+    id: int
+    role: UserRole
+    is_active: bool
+
+async def load_user(db: AsyncSession, user_id: int) -> User:
+    user = await db.get(User, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -73,15 +174,39 @@ def get_current_user(
         )
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """Get current authenticated user, served from the principal cache when possible"""
+    token = credentials.credentials
+    payload = verify_token(token)
+    user_id = int(payload.get("sub"))
+    
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        generation = principal_cache.generation
+        user = await load_user(db, user_id)
+        principal = Principal(id=user.id, role=user.role, is_active=user.is_active)
+        principal_cache.set(user_id, principal, generation=generation)
+    return principal
+
+def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     """Get current active user"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+async def get_current_active_user_record(
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Full user row, for endpoints that return the caller's profile"""
+    return await load_user(db, current_user.id)
+
 def require_role(required_role: UserRole):
     """Decorator to require specific user role"""
-    def role_checker(current_user: User = Depends(get_current_active_user)) -> User:
+    def role_checker(current_user: Principal = Depends(get_current_active_user)) -> Principal:
         if current_user.role != required_role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -90,7 +215,7 @@ def require_role(required_role: UserRole):
         return current_user
     return role_checker
 
-def require_admin(current_user: User = Depends(get_current_active_user)) -> User:
+def require_admin(current_user: Principal = Depends(get_current_active_user)) -> Principal:
     """Require admin role"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -99,7 +224,7 @@ def require_admin(current_user: User = Depends(get_current_active_user)) -> User
         )
     return current_user
 
-def require_teacher(current_user: User = Depends(get_current_active_user)) -> User:
+def require_teacher(current_user: Principal = Depends(get_current_active_user)) -> Principal:
     """Require teacher role"""
     if current_user.role != UserRole.TEACHER:
         raise HTTPException(
@@ -108,7 +233,7 @@ def require_teacher(current_user: User = Depends(get_current_active_user)) -> Us
         )
     return current_user
 
-def require_teacher_or_admin(current_user: User = Depends(get_current_active_user)) -> User:
+def require_teacher_or_admin(current_user: Principal = Depends(get_current_active_user)) -> Principal:
     """Require teacher or admin role"""
     if current_user.role not in [UserRole.TEACHER, UserRole.ADMIN]:
         raise HTTPException(
@@ -1,20 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from datetime import timedelta
-from database import get_db, hash_password
+from typing import Optional
+from database import get_db
 from models import User, UserRole
-from schemas import UserCreate, UserLogin, User as UserSchema
-from auth import authenticate_user, create_access_token, get_current_active_user, ACCESS_TOKEN_EXPIRE_MINUTES
+from schemas import UserCreate, UserLogin, TokenRefresh, User as UserSchema
+from auth import (
+    authenticate_user, create_access_token, get_current_active_user_record, issue_refresh_token,
+    rotate_refresh_token, find_refresh_token, revoke_refresh_family, purge_expired_refresh_tokens,
+    ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS
+)
+from cache import invalidate_dashboard_stats
+from password_hashing import hash_password_async
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 security = HTTPBearer()
 
 @router.post("/signup")
-async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
+async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """User registration endpoint"""
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    existing_user = result.scalars().first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -29,7 +38,7 @@ async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
     new_user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -38,8 +47,8 @@ async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    invalidate_dashboard_stats()
     
     return {
         "message": "User created successfully",
@@ -51,24 +60,8 @@ async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
         }
     }
 
-@router.post("/login")
-async def login(login_data: UserLogin, db: Session = Depends(get_db)):
-    """User login endpoint"""
-    user = authenticate_user(db, login_data.email, login_data.password)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Account is deactivated"
-        )
-    
-    # Create access token
+def token_response(user: User, refresh_token: str) -> dict:
+    """Access and refresh tokens plus the user profile, as returned by login and refresh"""
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": str(user.id), "email": user.email, "role": user.role.value},
@@ -77,8 +70,10 @@ async def login(login_data: UserLogin, db: Session = Depends(get_db)):
     
     return {
         "access_token": access_token,
+        "refresh_token": refresh_token,
         "token_type": "bearer",
         "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "refresh_expires_in": REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
         "user": {
             "id": user.id,
             "email": user.email,
@@ -87,18 +82,51 @@ async def login(login_data: UserLogin, db: Session = Depends(get_db)):
         }
     }
 
+@router.post("/login")
+async def login(login_data: UserLogin, db: AsyncSession = Depends(get_db)):
+    """User login endpoint"""
+    user = await authenticate_user(db, login_data.email, login_data.password)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Account is deactivated"
+        )
+    
+    await purge_expired_refresh_tokens(db, user.id)
+    refresh_token = issue_refresh_token(db, user.id)
+    await db.commit()
+    return token_response(user, refresh_token)
+
+@router.post("/refresh")
+async def refresh(token_data: TokenRefresh, db: AsyncSession = Depends(get_db)):
+    """Exchange a refresh token for a new access token and a rotated refresh token"""
+    user, refresh_token = await rotate_refresh_token(db, token_data.refresh_token)
+    return token_response(user, refresh_token)
+
 @router.get("/me", response_model=UserSchema)
-async def get_current_user_info(current_user: User = Depends(get_current_active_user)):
+async def get_current_user_info(current_user: User = Depends(get_current_active_user_record)):
     """Get current user information"""
     return current_user
 
 @router.post("/logout")
-async def logout():
-    """Logout endpoint (client-side token removal)"""
+async def logout(token_data: Optional[TokenRefresh] = None, db: AsyncSession = Depends(get_db)):
+    """Logout endpoint: revokes the session's refresh tokens; the access token expires on its own"""
+    if token_data is not None:
+        stored = await find_refresh_token(db, token_data.refresh_token)
+        if stored is not None:
+            await revoke_refresh_family(db, stored.family_id)
+            await db.commit()
     return {"message": "Successfully logged out"}
 
 @router.get("/verify-token")
-async def verify_token(current_user: User = Depends(get_current_active_user)):
+async def verify_token(current_user: User = Depends(get_current_active_user_record)):
     """Verify if token is valid"""
     return {
         "valid": True,
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+JSON response encoding benchmark
+Times rendering a 10k-row attendance list through the stdlib JSONResponse
+path, pydantic's own JSON dump and json_response.FastJSONResponse (orjson,
+or its stdlib fallback)
+
+Usage: python benchmarks/json_encoding.py [--rows 10000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+import json_response
+from json_response import FastJSONResponse
+from models import AttendanceStatus, UserRole
+from schemas import Attendance
+
+def build_rows(count: int) -> list:
+    now = datetime.utcnow()
+    teacher = {"id": 1, "email": "teacher@example.com", "full_name": "Teacher", "role": UserRole.TEACHER,
+               "created_at": now, "is_active": True}
+    class_obj = {"id": 1, "name": "Mathematics", "description": "Algebra", "teacher_id": 1,
+                 "created_at": now, "is_active": True, "teacher": teacher}
+    statuses = list(AttendanceStatus)
+    return [
+        Attendance(
+            id=i, student_id=2 + i % 30, class_id=1, date=datetime(2024, 9, 1) + timedelta(days=i // 30),
+            status=statuses[i % len(statuses)], grade=i % 100, notes=None, marked_by=1, created_at=now,
+            student={**teacher, "id": 2 + i % 30, "email": f"student{i % 30}@example.com", "role": UserRole.STUDENT},
+            class_obj=class_obj
+        )
+        for i in range(count)
+    ]
+
+def best_of(repeat: int, func) -> float:
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON response encoders")
+    parser.add_argument("--rows", type=int, default=10000, help="attendance rows per payload")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case (best is reported)")
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    adapter = TypeAdapter(List[Attendance])
+    # Sparse rows (see sparse.py) still hold datetimes and enums
+    sparse = [{"id": r.id, "student_id": r.student_id, "date": r.date, "status": r.status} for r in rows]
+
+    # response_model cases include the schema dump FastAPI performs before rendering
+    cases = [
+        ("response_model, JSONResponse + jsonable_encoder",
+         lambda: JSONResponse(jsonable_encoder(adapter.dump_python(rows, mode="json"))).body),
+        ("response_model, pydantic dump_json",
+         lambda: adapter.dump_json(rows)),
+        ("response_model, FastJSONResponse",
+         lambda: FastJSONResponse(adapter.dump_python(rows, mode="json")).body),
+        ("sparse rows, JSONResponse + jsonable_encoder",
+         lambda: JSONResponse(jsonable_encoder(sparse)).body),
+        ("sparse rows, FastJSONResponse",
+         lambda: FastJSONResponse(sparse).body),
+    ]
+
+    backend = "orjson" if json_response.orjson is not None else "stdlib fallback"
+    print(f"{args.rows} rows, best of {args.repeat}, FastJSONResponse backend: {backend}\n")
+    for name, func in cases:
+        print(f"  {name:50s} {best_of(args.repeat, func) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
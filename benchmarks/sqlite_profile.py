@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+SQLite tuning profile benchmark
+Runs a mixed read/write attendance workload against a scratch database
+with and without the PRAGMAs from database.SQLITE_PRAGMAS
+
+Usage: python benchmarks/sqlite_profile.py [--threads 8] [--seconds 5] [--write-ratio 0.2]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from models import Base, User, UserRole, Class, Enrollment, Attendance, AttendanceStatus
+from database import enable_sqlite_tuning
+
+CLASSES = 20
+STUDENTS_PER_CLASS = 30
+
+def seed(engine):
+    """Create a teacher, classes and enrolled students"""
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        teacher = User(email="teacher@bench.local", hashed_password="x", full_name="Teacher", role=UserRole.TEACHER)
+        db.add(teacher)
+        db.flush()
+        for c in range(CLASSES):
+            class_obj = Class(name=f"Class {c}", teacher_id=teacher.id)
+            db.add(class_obj)
+            db.flush()
+            for s in range(STUDENTS_PER_CLASS):
+                student = User(
+                    email=f"student{c}-{s}@bench.local",
+                    hashed_password="x",
+                    full_name=f"Student {c}-{s}",
+                    role=UserRole.STUDENT
+                )
+                db.add(student)
+                db.flush()
+                db.add(Enrollment(student_id=student.id, class_id=class_obj.id))
+        db.commit()
+        return [row for row in db.execute(select(Enrollment.class_id, Enrollment.student_id)).all()]
+
+def worker(Session, enrollments, deadline, write_ratio, counters, lock):
+    rng = random.Random()
+    reads = writes = errors = 0
+    statuses = list(AttendanceStatus)
+    while time.perf_counter() < deadline:
+        class_id, student_id = rng.choice(enrollments)
+        try:
+            with Session() as db:
+                if rng.random() < write_ratio:
+                    db.add(Attendance(
+                        student_id=student_id,
+                        class_id=class_id,
+                        date=datetime(2024, 1, 1) + timedelta(days=rng.randrange(365)),
+                        status=rng.choice(statuses)
+                    ))
+                    db.commit()
+                    writes += 1
+                else:
+                    db.execute(select(Attendance).where(Attendance.class_id == class_id)).scalars().all()
+                    reads += 1
+        except OperationalError:
+            errors += 1
+    with lock:
+        counters["reads"] += reads
+        counters["writes"] += writes
+        counters["errors"] += errors
+
+def run(tuned: bool, threads: int, seconds: float, write_ratio: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            connect_args={"check_same_thread": False},
+            pool_size=threads,
+            max_overflow=0
+        )
+        if tuned:
+            enable_sqlite_tuning(engine)
+        enrollments = seed(engine)
+        Session = sessionmaker(bind=engine)
+
+        counters = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+        pool = [
+            threading.Thread(target=worker, args=(Session, enrollments, deadline, write_ratio, counters, lock))
+            for _ in range(threads)
+        ]
+        started = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+
+    counters["ops_per_sec"] = (counters["reads"] + counters["writes"]) / elapsed
+    return counters
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"Mixed workload: {args.threads} threads, {args.seconds:.0f}s, {args.write_ratio:.0%} writes\n")
+    print(f"{'profile':<10} {'reads':>8} {'writes':>8} {'errors':>7} {'ops/sec':>10}")
+    for label, tuned in (("default", False), ("tuned", True)):
+        result = run(tuned, args.threads, args.seconds, args.write_ratio)
+        print(f"{label:<10} {result['reads']:>8} {result['writes']:>8} {result['errors']:>7} {result['ops_per_sec']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import chain
+from typing import Any, Callable, FrozenSet, Hashable, Iterable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models import User, UserRole
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache with expiring entries (one copy per API worker)"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bumped on every invalidation so callers can detect writes that raced a recompute
+        self.generation = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, generation: Optional[int] = None):
+        """Store a value; skipped if an invalidation happened since `generation` was read"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self.generation += 1
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def pop_where(self, predicate: Callable[[Hashable, Any], bool]):
+        """Evict every entry for which predicate(key, value) is true"""
+        with self._lock:
+            self.generation += 1
+            for key in [k for k, (_, v) in self._data.items() if predicate(k, v)]:
+                del self._data[key]
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+# Dashboard statistics -------------------------------------------------------
+
+@dataclass(frozen=True)
+class CachedStats:
+    class_ids: FrozenSet[int]  # classes the statistics were computed from
+    stats: dict
+
+dashboard_stats_cache = TTLCache(
+    maxsize=int(os.getenv("LMS_STATS_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("LMS_STATS_CACHE_TTL", "60"))
+)
+
+def invalidate_dashboard_stats(class_ids: Iterable[int] = (), user_ids: Iterable[int] = ()):
+    """Evict admin statistics plus any teacher/student entry touching the given classes or users"""
+    class_ids = set(class_ids)
+    user_ids = set(user_ids)
+
+    def affected(key, cached: CachedStats) -> bool:
+        role, user_id = key
+        return role == UserRole.ADMIN.value or user_id in user_ids or not cached.class_ids.isdisjoint(class_ids)
+
+    dashboard_stats_cache.pop_where(affected)
+
+# Verified tokens ------------------------------------------------------------
+
+# sha256(token) -> decoded claims; each entry's TTL ends at the token's exp
+token_cache = TTLCache(
+    maxsize=int(os.getenv("LMS_TOKEN_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("LMS_TOKEN_CACHE_TTL", "1800"))
+)
+
+# Authenticated principals ---------------------------------------------------
+
+# user id -> auth.Principal; the TTL bounds staleness for changes made outside this process
+principal_cache = TTLCache(
+    maxsize=int(os.getenv("LMS_PRINCIPAL_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("LMS_PRINCIPAL_CACHE_TTL", "60"))
+)
+
+PRINCIPAL_ATTRIBUTES = ("role", "is_active")
+
+@event.listens_for(Session, "after_flush")
+def _track_principal_changes(session, flush_context):
+    """Remember users whose role or active flag changed so their principals drop on commit"""
+    changed = session.info.setdefault("principal_changes", set())
+    for obj in chain(session.dirty, session.deleted):
+        if not isinstance(obj, User):
+            continue
+        state = inspect(obj)
+        if state.deleted or obj in session.deleted or any(
+            state.attrs[name].history.has_changes() for name in PRINCIPAL_ATTRIBUTES
+        ):
+            changed.add(obj.id)
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_user_writes(orm_execute_state):
+    """Bulk UPDATE/DELETE on users bypasses the flush, and its rows are unknown: drop all principals on commit"""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if table is not None and table.name == User.__tablename__:
+        orm_execute_state.session.info["principal_bulk_change"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_principals(session):
+    # After commit, so a concurrent request cannot re-cache the old row
+    if session.info.pop("principal_bulk_change", False):
+        session.info.pop("principal_changes", None)
+        principal_cache.clear()
+        return
+    for user_id in session.info.pop("principal_changes", ()):
+        principal_cache.pop(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_changes(session):
+    session.info.pop("principal_changes", None)
+    session.info.pop("principal_bulk_change", None)
@@ -1,18 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
-from models import Class, User, UserRole, Enrollment
-from schemas import ClassCreate, Class as ClassSchema
-from auth import get_current_active_user, require_teacher_or_admin, require_admin
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from typing import List, Optional
+from database import get_db, get_read_db
+from models import Class, User, UserRole, Enrollment, AttendanceSummary
+from schemas import ClassCreate, ClassOverviewReport, Class as ClassSchema
+from auth import get_current_active_user, require_teacher_or_admin, require_admin, Principal
+from cache import invalidate_dashboard_stats
+from loaders import CLASS_LIST_OPTIONS, CLASS_DETAIL_OPTIONS
+from pagination import PageParams, page_params, paginate
+from attendance_summary import summary_count_columns
 
 router = APIRouter(prefix="/classes", tags=["classes"])
 
+async def load_class(db: AsyncSession, class_id: int) -> Optional[Class]:
+    """Load a class together with its teacher for serialization"""
+    result = await db.execute(
+        select(Class)
+        .options(*CLASS_DETAIL_OPTIONS)
+        .where(Class.id == class_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
 @router.post("/", response_model=ClassSchema)
 async def create_class(
     class_data: ClassCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_teacher_or_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_teacher_or_admin)
 ):
     """Create a new class (Teachers and Admins only)"""
     # Only teachers can create classes for themselves, admins can create for any teacher
@@ -27,58 +42,126 @@ async def create_class(
     )
     
     db.add(new_class)
-    db.commit()
-    db.refresh(new_class)
+    await db.commit()
+    invalidate_dashboard_stats(user_ids=[teacher_id])
     
-    return new_class
+    return await load_class(db, new_class.id)
 
 @router.get("/", response_model=List[ClassSchema])
 async def get_classes(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """Get classes based on user role"""
+    query = select(Class).options(*CLASS_LIST_OPTIONS)
     if current_user.role == UserRole.ADMIN:
         # Admin can see all classes
-        classes = db.query(Class).filter(Class.is_active == True).all()
+        query = query.where(Class.is_active == True)
     elif current_user.role == UserRole.TEACHER:
         # Teachers can see their own classes
-        classes = db.query(Class).filter(
+        query = query.where(
             Class.teacher_id == current_user.id,
             Class.is_active == True
-        ).all()
+        )
     else:  # Student
         # Students can see classes they're enrolled in
-        enrollments = db.query(Enrollment).filter(
+        enrolled_class_ids = select(Enrollment.class_id).where(
             Enrollment.student_id == current_user.id,
             Enrollment.is_active == True
-        ).all()
-        class_ids = [e.class_id for e in enrollments]
-        classes = db.query(Class).filter(
-            Class.id.in_(class_ids),
+        )
+        query = query.where(
+            Class.id.in_(enrolled_class_ids),
             Class.is_active == True
-        ).all()
+        )
+    
+    return await paginate(db, query, (Class.id,), page, response)
+
+# Declared before /{class_id} so "overview" is not parsed as a class id
+@router.get("/overview", response_model=ClassOverviewReport)
+async def get_class_overview(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(require_teacher_or_admin)
+):
+    """Active classes with enrollment counts and attendance rates, plus per-teacher workload"""
+    enrollment_counts = (
+        select(Enrollment.class_id, func.count(Enrollment.id).label("enrollment_count"))
+        .where(Enrollment.is_active == True)
+        .group_by(Enrollment.class_id)
+        .subquery()
+    )
+    attendance_counts = (
+        select(AttendanceSummary.class_id, *summary_count_columns())
+        .group_by(AttendanceSummary.class_id)
+        .subquery()
+    )
+    query = (
+        select(
+            Class.id.label("class_id"),
+            Class.name.label("class_name"),
+            Class.teacher_id,
+            User.full_name.label("teacher_name"),
+            User.email.label("teacher_email"),
+            Class.created_at,
+            Class.is_active,
+            func.coalesce(enrollment_counts.c.enrollment_count, 0).label("enrollment_count"),
+            func.coalesce(attendance_counts.c.total, 0).label("attendance_records"),
+            attendance_counts.c.present
+        )
+        .join(User, Class.teacher_id == User.id)
+        .outerjoin(enrollment_counts, enrollment_counts.c.class_id == Class.id)
+        .outerjoin(attendance_counts, attendance_counts.c.class_id == Class.id)
+        .where(Class.is_active == True)
+        .order_by(Class.id)
+    )
+    workload_query = (
+        select(
+            User.id.label("teacher_id"),
+            User.full_name.label("teacher_name"),
+            func.count(func.distinct(Class.id)).label("class_count"),
+            func.count(Enrollment.id).label("enrollment_count"),
+            func.count(func.distinct(Enrollment.student_id)).label("student_count")
+        )
+        .join(Class, Class.teacher_id == User.id)
+        .outerjoin(Enrollment, (Enrollment.class_id == Class.id) & (Enrollment.is_active == True))
+        .where(Class.is_active == True)
+        .group_by(User.id, User.full_name)
+        .order_by(User.full_name, User.id)
+    )
+    if current_user.role == UserRole.TEACHER:
+        query = query.where(Class.teacher_id == current_user.id)
+        workload_query = workload_query.where(User.id == current_user.id)
     
-    return classes
+    classes = []
+    for row in (await db.execute(query)).all():
+        overview = row._asdict()
+        present = overview.pop("present")
+        if row.attendance_records:
+            overview["attendance_rate"] = round(present / row.attendance_records * 100, 1)
+        classes.append(overview)
+    teachers = [row._asdict() for row in (await db.execute(workload_query)).all()]
+    return {"classes": classes, "teachers": teachers}
 
 @router.get("/{class_id}", response_model=ClassSchema)
 async def get_class(
     class_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """Get specific class details"""
-    class_obj = db.query(Class).filter(Class.id == class_id).first()
+    class_obj = await load_class(db, class_id)
     if not class_obj:
         raise HTTPException(status_code=404, detail="Class not found")
     
     # Check access permissions
     if current_user.role == UserRole.STUDENT:
-        enrollment = db.query(Enrollment).filter(
+        result = await db.execute(select(Enrollment).where(
             Enrollment.student_id == current_user.id,
             Enrollment.class_id == class_id,
             Enrollment.is_active == True
-        ).first()
+        ))
+        enrollment = result.scalars().first()
         if not enrollment:
             raise HTTPException(status_code=403, detail="Access denied")
     elif current_user.role == UserRole.TEACHER:
@@ -91,11 +174,11 @@ async def get_class(
 async def update_class(
     class_id: int,
     class_data: ClassCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_teacher_or_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_teacher_or_admin)
 ):
     """Update class details"""
-    class_obj = db.query(Class).filter(Class.id == class_id).first()
+    class_obj = await db.get(Class, class_id)
     if not class_obj:
         raise HTTPException(status_code=404, detail="Class not found")
     
@@ -106,23 +189,24 @@ async def update_class(
     class_obj.name = class_data.name
     class_obj.description = class_data.description
     
-    db.commit()
-    db.refresh(class_obj)
+    await db.commit()
+    invalidate_dashboard_stats(class_ids=[class_obj.id])
     
-    return class_obj
+    return await load_class(db, class_obj.id)
 
 @router.delete("/{class_id}")
 async def delete_class(
     class_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin)
 ):
     """Delete class (Admin only)"""
-    class_obj = db.query(Class).filter(Class.id == class_id).first()
+    class_obj = await db.get(Class, class_id)
     if not class_obj:
         raise HTTPException(status_code=404, detail="Class not found")
     
     class_obj.is_active = False
-    db.commit()
+    await db.commit()
+    invalidate_dashboard_stats(class_ids=[class_obj.id])
     
     return {"message": "Class deleted successfully"}
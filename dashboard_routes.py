@@ -1,40 +1,83 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, case
 from typing import Dict, List
-from database import get_db
-from models import User, Class, Enrollment, Attendance, UserRole, AttendanceStatus
+from database import get_read_db
+from models import User, Class, Enrollment, AttendanceSummary, UserRole
 from schemas import AttendanceStats, ClassStats
-from auth import get_current_active_user
+from auth import get_current_active_user, Principal
+from attendance_summary import summary_count_columns
+from cache import dashboard_stats_cache, CachedStats
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
 @router.get("/stats")
 async def get_dashboard_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """Get dashboard statistics based on user role"""
+    cache_key = (current_user.role.value, current_user.id)
+    cached = dashboard_stats_cache.get(cache_key)
+    if cached is not None:
+        return cached.stats
+    generation = dashboard_stats_cache.generation
+    
     if current_user.role == UserRole.ADMIN:
-        return await get_admin_stats(db)
+        stats = await get_admin_stats(db)
+        class_ids = frozenset()
     elif current_user.role == UserRole.TEACHER:
-        return await get_teacher_stats(db, current_user.id)
+        stats = await get_teacher_stats(db, current_user.id)
+        class_ids = frozenset(c["class_id"] for c in stats["class_statistics"])
     else:  # Student
-        return await get_student_stats(db, current_user.id)
+        stats = await get_student_stats(db, current_user.id)
+        class_ids = frozenset(c["class_id"] for c in stats["class_attendance"])
+    
+    dashboard_stats_cache.set(cache_key, CachedStats(class_ids, stats), generation=generation)
+    return stats
+
+def _attendance_overview(total: int, present: int, absent: int, tardy: int) -> Dict:
+    return {
+        "total_records": total,
+        "present": present,
+        "absent": absent,
+        "tardy": tardy,
+        "present_percentage": (present / total * 100) if total > 0 else 0,
+        "absent_percentage": (absent / total * 100) if total > 0 else 0,
+        "tardy_percentage": (tardy / total * 100) if total > 0 else 0
+    }
 
-async def get_admin_stats(db: Session) -> Dict:
+def _attendance_stats(total: int, present: int, absent: int, tardy: int) -> Dict:
+    return {
+        "total_sessions": total,
+        "present_count": present,
+        "absent_count": absent,
+        "tardy_count": tardy,
+        "present_percentage": (present / total * 100) if total > 0 else 0,
+        "absent_percentage": (absent / total * 100) if total > 0 else 0,
+        "tardy_percentage": (tardy / total * 100) if total > 0 else 0
+    }
+
+async def get_admin_stats(db: AsyncSession) -> Dict:
     """Get admin dashboard statistics"""
-    total_users = db.query(User).filter(User.is_active == True).count()
-    total_teachers = db.query(User).filter(User.role == UserRole.TEACHER, User.is_active == True).count()
-    total_students = db.query(User).filter(User.role == UserRole.STUDENT, User.is_active == True).count()
-    total_classes = db.query(Class).filter(Class.is_active == True).count()
-    total_enrollments = db.query(Enrollment).filter(Enrollment.is_active == True).count()
+    user_counts = (await db.execute(
+        select(
+            func.count(User.id),
+            func.count(case((User.role == UserRole.TEACHER, 1))),
+            func.count(case((User.role == UserRole.STUDENT, 1)))
+        ).where(User.is_active == True)
+    )).one()
+    total_users, total_teachers, total_students = user_counts
+    
+    total_classes, total_enrollments = (await db.execute(
+        select(
+            select(func.count(Class.id)).where(Class.is_active == True).scalar_subquery(),
+            select(func.count(Enrollment.id)).where(Enrollment.is_active == True).scalar_subquery()
+        )
+    )).one()
     
-    # Attendance statistics
-    total_attendance_records = db.query(Attendance).count()
-    present_count = db.query(Attendance).filter(Attendance.status == AttendanceStatus.PRESENT).count()
-    absent_count = db.query(Attendance).filter(Attendance.status == AttendanceStatus.ABSENT).count()
-    tardy_count = db.query(Attendance).filter(Attendance.status == AttendanceStatus.TARDY).count()
+    # Attendance statistics from the maintained summary counters
+    attendance = (await db.execute(select(*summary_count_columns()))).one()
     
     return {
         "total_users": total_users,
@@ -42,136 +85,106 @@ async def get_admin_stats(db: Session) -> Dict:
         "total_students": total_students,
         "total_classes": total_classes,
         "total_enrollments": total_enrollments,
-        "attendance_overview": {
-            "total_records": total_attendance_records,
-            "present": present_count,
-            "absent": absent_count,
-            "tardy": tardy_count,
-            "present_percentage": (present_count / total_attendance_records * 100) if total_attendance_records > 0 else 0,
-            "absent_percentage": (absent_count / total_attendance_records * 100) if total_attendance_records > 0 else 0,
-            "tardy_percentage": (tardy_count / total_attendance_records * 100) if total_attendance_records > 0 else 0
-        }
+        "attendance_overview": _attendance_overview(
+            attendance.total, attendance.present, attendance.absent, attendance.tardy
+        )
     }
 
-async def get_teacher_stats(db: Session, teacher_id: int) -> Dict:
+async def get_teacher_stats(db: AsyncSession, teacher_id: int) -> Dict:
     """Get teacher dashboard statistics"""
-    teacher_classes = db.query(Class).filter(Class.teacher_id == teacher_id, Class.is_active == True).all()
+    result = await db.execute(
+        select(Class.id, Class.name)
+        .where(Class.teacher_id == teacher_id, Class.is_active == True)
+        .order_by(Class.id)
+    )
+    teacher_classes = result.all()
     class_ids = [c.id for c in teacher_classes]
     
-    total_classes = len(teacher_classes)
-    total_students = db.query(Enrollment).filter(
-        Enrollment.class_id.in_(class_ids),
-        Enrollment.is_active == True
-    ).count()
+    # Per-class enrollment and attendance counts, one grouped query each
+    result = await db.execute(
+        select(Enrollment.class_id, func.count(Enrollment.id))
+        .where(Enrollment.class_id.in_(class_ids), Enrollment.is_active == True)
+        .group_by(Enrollment.class_id)
+    )
+    enrollment_counts = dict(result.all())
     
-    # Attendance statistics for teacher's classes
-    attendance_records = db.query(Attendance).filter(Attendance.class_id.in_(class_ids)).all()
-    total_records = len(attendance_records)
+    result = await db.execute(
+        select(AttendanceSummary.class_id, *summary_count_columns())
+        .where(AttendanceSummary.class_id.in_(class_ids))
+        .group_by(AttendanceSummary.class_id)
+    )
+    attendance_counts = {row.class_id: row for row in result.all()}
     
-    present_count = len([a for a in attendance_records if a.status == AttendanceStatus.PRESENT])
-    absent_count = len([a for a in attendance_records if a.status == AttendanceStatus.ABSENT])
-    tardy_count = len([a for a in attendance_records if a.status == AttendanceStatus.TARDY])
-    
-    # Class-wise statistics
+    total_records = present_count = absent_count = tardy_count = 0
     class_stats = []
     for class_obj in teacher_classes:
-        class_enrollments = db.query(Enrollment).filter(
-            Enrollment.class_id == class_obj.id,
-            Enrollment.is_active == True
-        ).count()
-        
-        class_attendance = db.query(Attendance).filter(Attendance.class_id == class_obj.id).all()
-        class_total = len(class_attendance)
-        class_present = len([a for a in class_attendance if a.status == AttendanceStatus.PRESENT])
-        class_absent = len([a for a in class_attendance if a.status == AttendanceStatus.ABSENT])
-        class_tardy = len([a for a in class_attendance if a.status == AttendanceStatus.TARDY])
+        counts = attendance_counts.get(class_obj.id)
+        class_total, class_present, class_absent, class_tardy = (
+            (counts.total, counts.present, counts.absent, counts.tardy) if counts else (0, 0, 0, 0)
+        )
+        total_records += class_total
+        present_count += class_present
+        absent_count += class_absent
+        tardy_count += class_tardy
         
         class_stats.append({
             "class_id": class_obj.id,
             "class_name": class_obj.name,
-            "total_students": class_enrollments,
-            "attendance_stats": {
-                "total_sessions": class_total,
-                "present_count": class_present,
-                "absent_count": class_absent,
-                "tardy_count": class_tardy,
-                "present_percentage": (class_present / class_total * 100) if class_total > 0 else 0,
-                "absent_percentage": (class_absent / class_total * 100) if class_total > 0 else 0,
-                "tardy_percentage": (class_tardy / class_total * 100) if class_total > 0 else 0
-            }
+            "total_students": enrollment_counts.get(class_obj.id, 0),
+            "attendance_stats": _attendance_stats(class_total, class_present, class_absent, class_tardy)
         })
     
     return {
-        "total_classes": total_classes,
-        "total_students": total_students,
-        "attendance_overview": {
-            "total_records": total_records,
-            "present": present_count,
-            "absent": absent_count,
-            "tardy": tardy_count,
-            "present_percentage": (present_count / total_records * 100) if total_records > 0 else 0,
-            "absent_percentage": (absent_count / total_records * 100) if total_records > 0 else 0,
-            "tardy_percentage": (tardy_count / total_records * 100) if total_records > 0 else 0
-        },
+        "total_classes": len(teacher_classes),
+        "total_students": sum(enrollment_counts.values()),
+        "attendance_overview": _attendance_overview(total_records, present_count, absent_count, tardy_count),
         "class_statistics": class_stats
     }
 
-async def get_student_stats(db: Session, student_id: int) -> Dict:
+async def get_student_stats(db: AsyncSession, student_id: int) -> Dict:
     """Get student dashboard statistics"""
-    enrollments = db.query(Enrollment).filter(
-        Enrollment.student_id == student_id,
-        Enrollment.is_active == True
-    ).all()
+    result = await db.execute(
+        select(Class.id, Class.name, User.full_name.label("teacher_name"))
+        .join(Enrollment, Enrollment.class_id == Class.id)
+        .join(User, User.id == Class.teacher_id)
+        .where(Enrollment.student_id == student_id, Enrollment.is_active == True)
+        .order_by(Enrollment.id)
+    )
+    enrolled_classes = result.all()
+    class_ids = [c.id for c in enrolled_classes]
     
-    total_classes = len(enrollments)
-    class_ids = [e.class_id for e in enrollments]
+    # Student's attendance counts per class from the summary counters
+    result = await db.execute(
+        select(AttendanceSummary.class_id, *summary_count_columns())
+        .where(AttendanceSummary.student_id == student_id, AttendanceSummary.class_id.in_(class_ids))
+        .group_by(AttendanceSummary.class_id)
+    )
+    attendance_counts = {row.class_id: row for row in result.all()}
     
-    # Student's attendance records
-    attendance_records = db.query(Attendance).filter(
-        Attendance.student_id == student_id,
-        Attendance.class_id.in_(class_ids)
-    ).all()
-    
-    total_records = len(attendance_records)
-    present_count = len([a for a in attendance_records if a.status == AttendanceStatus.PRESENT])
-    absent_count = len([a for a in attendance_records if a.status == AttendanceStatus.ABSENT])
-    tardy_count = len([a for a in attendance_records if a.status == AttendanceStatus.TARDY])
-    
-    # Class-wise attendance
+    total_records = present_count = absent_count = tardy_count = 0
     class_attendance = []
-    for enrollment in enrollments:
-        class_obj = db.query(Class).filter(Class.id == enrollment.class_id).first()
-        class_records = [a for a in attendance_records if a.class_id == enrollment.class_id]
-        class_total = len(class_records)
-        class_present = len([a for a in class_records if a.status == AttendanceStatus.PRESENT])
-        class_absent = len([a for a in class_records if a.status == AttendanceStatus.ABSENT])
-        class_tardy = len([a for a in class_records if a.status == AttendanceStatus.TARDY])
+    for class_obj in enrolled_classes:
+        counts = attendance_counts.get(class_obj.id)
+        class_total, class_present, class_absent, class_tardy = (
+            (counts.total, counts.present, counts.absent, counts.tardy) if counts else (0, 0, 0, 0)
+        )
         
         class_attendance.append({
             "class_id": class_obj.id,
             "class_name": class_obj.name,
-            "teacher_name": class_obj.teacher.full_name,
-            "attendance_stats": {
-                "total_sessions": class_total,
-                "present_count": class_present,
-                "absent_count": class_absent,
-                "tardy_count": class_tardy,
-                "present_percentage": (class_present / class_total * 100) if class_total > 0 else 0,
-                "absent_percentage": (class_absent / class_total * 100) if class_total > 0 else 0,
-                "tardy_percentage": (class_tardy / class_total * 100) if class_total > 0 else 0
-            }
+            "teacher_name": class_obj.teacher_name,
+            "attendance_stats": _attendance_stats(class_total, class_present, class_absent, class_tardy)
         })
     
+    # A class enrolled twice would otherwise be counted twice in the totals
+    for counts in attendance_counts.values():
+        total_records += counts.total
+        present_count += counts.present
+        absent_count += counts.absent
+        tardy_count += counts.tardy
+    
     return {
-        "total_classes": total_classes,
-        "overall_attendance": {
-            "total_records": total_records,
-            "present": present_count,
-            "absent": absent_count,
-            "tardy": tardy_count,
-            "present_percentage": (present_count / total_records * 100) if total_records > 0 else 0,
-            "absent_percentage": (absent_count / total_records * 100) if total_records > 0 else 0,
-            "tardy_percentage": (tardy_count / total_records * 100) if total_records > 0 else 0
-        },
+        "total_classes": len(enrolled_classes),
+        "overall_attendance": _attendance_overview(total_records, present_count, absent_count, tardy_count),
         "class_attendance": class_attendance
     }
@@ -1,27 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, tuple_
+from typing import List, Optional
+from database import get_db, get_read_db
 from models import Enrollment, User, Class, UserRole
-from schemas import EnrollmentCreate, Enrollment as EnrollmentSchema
-from auth import get_current_active_user, require_teacher_or_admin
+from schemas import (
+    EnrollmentCreate, Enrollment as EnrollmentSchema,
+    EnrollmentBulkRequest, EnrollmentBulkResponse
+)
+from auth import get_current_active_user, require_teacher_or_admin, Principal
+from cache import invalidate_dashboard_stats
+from loaders import ENROLLMENT_LIST_OPTIONS, ENROLLMENT_DETAIL_OPTIONS, ENROLLMENT_EXPANSIONS, list_options
+from pagination import PageParams, page_params, paginate
+from sparse import SPARSE_RESPONSES, ENROLLMENT_RESOURCE, FieldSelection, field_selection, sparse_response
 
 router = APIRouter(prefix="/enrollments", tags=["enrollments"])
 
+# Rows per lookup/insert batch; keeps bound parameters well under backend limits
+BULK_BATCH_SIZE = 500
+
+async def load_enrollment(db: AsyncSession, enrollment_id: int) -> Optional[Enrollment]:
+    """Load an enrollment with the relationships needed for its response"""
+    result = await db.execute(
+        select(Enrollment)
+        .options(*ENROLLMENT_DETAIL_OPTIONS)
+        .where(Enrollment.id == enrollment_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
 @router.post("/", response_model=EnrollmentSchema)
 async def enroll_student(
     enrollment_data: EnrollmentCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_teacher_or_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_teacher_or_admin)
 ):
     """Enroll a student in a class"""
     # Verify class exists
-    class_obj = db.query(Class).filter(Class.id == enrollment_data.class_id).first()
+    class_obj = await db.get(Class, enrollment_data.class_id)
     if not class_obj:
         raise HTTPException(status_code=404, detail="Class not found")
     
     # Verify student exists and is a student
-    student = db.query(User).filter(User.id == enrollment_data.student_id).first()
+    student = await db.get(User, enrollment_data.student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     if student.role != UserRole.STUDENT:
@@ -32,11 +53,12 @@ async def enroll_student(
         raise HTTPException(status_code=403, detail="Access denied")
     
     # Check if already enrolled
-    existing_enrollment = db.query(Enrollment).filter(
+    result = await db.execute(select(Enrollment).where(
         Enrollment.student_id == enrollment_data.student_id,
         Enrollment.class_id == enrollment_data.class_id,
         Enrollment.is_active == True
-    ).first()
+    ))
+    existing_enrollment = result.scalars().first()
     
     if existing_enrollment:
         raise HTTPException(status_code=400, detail="Student already enrolled in this class")
@@ -48,20 +70,163 @@ async def enroll_student(
     )
     
     db.add(new_enrollment)
-    db.commit()
-    db.refresh(new_enrollment)
+    await db.commit()
+    invalidate_dashboard_stats(class_ids=[enrollment_data.class_id], user_ids=[enrollment_data.student_id])
+    
+    return await load_enrollment(db, new_enrollment.id)
+
+def _batches(items: list, size: int = BULK_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+async def _validate_bulk_rows(db: AsyncSession, rows: List[EnrollmentCreate], current_user: Principal) -> list:
+    """Check students, classes and permissions with set queries; return an error (or None) per row"""
+    class_ids = list({row.class_id for row in rows})
+    student_ids = list({row.student_id for row in rows})
+    
+    class_teachers = {}
+    for batch in _batches(class_ids):
+        result = await db.execute(select(Class.id, Class.teacher_id).where(Class.id.in_(batch)))
+        class_teachers.update(result.all())
     
-    return new_enrollment
+    student_roles = {}
+    for batch in _batches(student_ids):
+        result = await db.execute(select(User.id, User.role).where(User.id.in_(batch)))
+        student_roles.update(result.all())
+    
+    errors = []
+    seen = set()
+    for row in rows:
+        pair = (row.student_id, row.class_id)
+        if pair in seen:
+            errors.append("Duplicate row in request")
+            continue
+        seen.add(pair)
+        
+        if row.class_id not in class_teachers:
+            errors.append("Class not found")
+        elif current_user.role == UserRole.TEACHER and class_teachers[row.class_id] != current_user.id:
+            errors.append("Access denied")
+        elif row.student_id not in student_roles:
+            errors.append("Student not found")
+        elif student_roles[row.student_id] != UserRole.STUDENT:
+            errors.append("User is not a student")
+        else:
+            errors.append(None)
+    return errors
+
+async def _active_enrollments(db: AsyncSession, pairs: list) -> dict:
+    """Active enrollments for (student_id, class_id) pairs, looked up in batches"""
+    found = {}
+    for batch in _batches(pairs):
+        result = await db.execute(select(Enrollment).where(
+            tuple_(Enrollment.student_id, Enrollment.class_id).in_(batch),
+            Enrollment.is_active == True
+        ))
+        for enrollment in result.scalars().all():
+            found[(enrollment.student_id, enrollment.class_id)] = enrollment
+    return found
+
+def _bulk_result(row: EnrollmentCreate, outcome: str, enrollment_id: Optional[int] = None,
+                 detail: Optional[str] = None) -> dict:
+    return {
+        "student_id": row.student_id,
+        "class_id": row.class_id,
+        "outcome": outcome,
+        "enrollment_id": enrollment_id,
+        "detail": detail
+    }
 
-@router.get("/class/{class_id}", response_model=List[EnrollmentSchema])
+def _bulk_response(results: list) -> dict:
+    failed = sum(1 for r in results if r["outcome"] == "error")
+    return {"succeeded": len(results) - failed, "failed": failed, "results": results}
+
+@router.post("/bulk", response_model=EnrollmentBulkResponse)
+async def enroll_students_bulk(
+    bulk_data: EnrollmentBulkRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_teacher_or_admin)
+):
+    """Enroll many (student, class) pairs in one transaction"""
+    rows = bulk_data.enrollments
+    errors = await _validate_bulk_rows(db, rows, current_user)
+    valid_pairs = [(row.student_id, row.class_id) for row, error in zip(rows, errors) if error is None]
+    existing = await _active_enrollments(db, valid_pairs)
+    
+    new_enrollments = {}
+    for pair in valid_pairs:
+        if pair not in existing:
+            new_enrollments[pair] = Enrollment(student_id=pair[0], class_id=pair[1])
+    
+    for batch in _batches(list(new_enrollments.values())):
+        db.add_all(batch)
+        await db.flush()
+    await db.commit()
+    invalidate_dashboard_stats(
+        class_ids={pair[1] for pair in new_enrollments},
+        user_ids={pair[0] for pair in new_enrollments}
+    )
+    
+    results = []
+    for row, error in zip(rows, errors):
+        pair = (row.student_id, row.class_id)
+        if error:
+            results.append(_bulk_result(row, "error", detail=error))
+        elif pair in existing:
+            results.append(_bulk_result(row, "error", existing[pair].id, "Student already enrolled in this class"))
+        else:
+            results.append(_bulk_result(row, "enrolled", new_enrollments[pair].id))
+    return _bulk_response(results)
+
+@router.post("/bulk/remove", response_model=EnrollmentBulkResponse)
+async def remove_enrollments_bulk(
+    bulk_data: EnrollmentBulkRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_teacher_or_admin)
+):
+    """Remove many (student, class) pairs in one transaction"""
+    rows = bulk_data.enrollments
+    errors = await _validate_bulk_rows(db, rows, current_user)
+    valid_pairs = [(row.student_id, row.class_id) for row, error in zip(rows, errors) if error is None]
+    existing = await _active_enrollments(db, valid_pairs)
+    
+    enrollment_ids = [enrollment.id for enrollment in existing.values()]
+    for batch in _batches(enrollment_ids):
+        await db.execute(
+            update(Enrollment)
+            .where(Enrollment.id.in_(batch))
+            .values(is_active=False)
+            .execution_options(synchronize_session=False)
+        )
+    await db.commit()
+    invalidate_dashboard_stats(
+        class_ids={pair[1] for pair in existing},
+        user_ids={pair[0] for pair in existing}
+    )
+    
+    results = []
+    for row, error in zip(rows, errors):
+        pair = (row.student_id, row.class_id)
+        if error:
+            results.append(_bulk_result(row, "error", detail=error))
+        elif pair in existing:
+            results.append(_bulk_result(row, "removed", existing[pair].id))
+        else:
+            results.append(_bulk_result(row, "error", detail="Enrollment not found"))
+    return _bulk_response(results)
+
+@router.get("/class/{class_id}", response_model=List[EnrollmentSchema], responses=SPARSE_RESPONSES)
 async def get_class_enrollments(
     class_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    response: Response,
+    page: PageParams = Depends(page_params),
+    selection: FieldSelection = Depends(field_selection(ENROLLMENT_RESOURCE)),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    """Get all enrollments for a specific class"""
+    """Get enrollments for a specific class, one page at a time; the schema applies only without fields/expand, which return a sparse {data, included} envelope"""
     # Verify class exists
-    class_obj = db.query(Class).filter(Class.id == class_id).first()
+    class_obj = await db.get(Class, class_id)
     if not class_obj:
         raise HTTPException(status_code=404, detail="Class not found")
     
@@ -70,57 +235,66 @@ async def get_class_enrollments(
         raise HTTPException(status_code=403, detail="Access denied")
     elif current_user.role == UserRole.STUDENT:
         # Students can only see if they're enrolled
-        enrollment = db.query(Enrollment).filter(
+        result = await db.execute(select(Enrollment).where(
             Enrollment.student_id == current_user.id,
             Enrollment.class_id == class_id,
             Enrollment.is_active == True
-        ).first()
+        ))
+        enrollment = result.scalars().first()
         if not enrollment:
             raise HTTPException(status_code=403, detail="Access denied")
     
-    enrollments = db.query(Enrollment).filter(
+    query = select(Enrollment).options(*list_options(ENROLLMENT_LIST_OPTIONS, ENROLLMENT_EXPANSIONS, selection)).where(
         Enrollment.class_id == class_id,
         Enrollment.is_active == True
-    ).all()
-    
+    )
+    enrollments = await paginate(db, query, (Enrollment.id,), page, response)
+    if selection.sparse:
+        return sparse_response(enrollments, selection, ENROLLMENT_RESOURCE, response)
     return enrollments
 
-@router.get("/student/{student_id}", response_model=List[EnrollmentSchema])
+@router.get("/student/{student_id}", response_model=List[EnrollmentSchema], responses=SPARSE_RESPONSES)
 async def get_student_enrollments(
     student_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    response: Response,
+    page: PageParams = Depends(page_params),
+    selection: FieldSelection = Depends(field_selection(ENROLLMENT_RESOURCE)),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    """Get all enrollments for a specific student"""
+    """Get enrollments for a specific student, one page at a time; the schema applies only without fields/expand, which return a sparse {data, included} envelope"""
     # Check permissions
     if current_user.role == UserRole.STUDENT and current_user.id != student_id:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    enrollments = db.query(Enrollment).filter(
+    query = select(Enrollment).options(*list_options(ENROLLMENT_LIST_OPTIONS, ENROLLMENT_EXPANSIONS, selection)).where(
         Enrollment.student_id == student_id,
         Enrollment.is_active == True
-    ).all()
-    
+    )
+    enrollments = await paginate(db, query, (Enrollment.id,), page, response)
+    if selection.sparse:
+        return sparse_response(enrollments, selection, ENROLLMENT_RESOURCE, response)
     return enrollments
 
 @router.delete("/{enrollment_id}")
 async def remove_enrollment(
     enrollment_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_teacher_or_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_teacher_or_admin)
 ):
     """Remove student from class"""
-    enrollment = db.query(Enrollment).filter(Enrollment.id == enrollment_id).first()
+    enrollment = await db.get(Enrollment, enrollment_id)
     if not enrollment:
         raise HTTPException(status_code=404, detail="Enrollment not found")
     
     # Check permissions for teachers
     if current_user.role == UserRole.TEACHER:
-        class_obj = db.query(Class).filter(Class.id == enrollment.class_id).first()
+        class_obj = await db.get(Class, enrollment.class_id)
         if class_obj.teacher_id != current_user.id:
             raise HTTPException(status_code=403, detail="Access denied")
     
     enrollment.is_active = False
-    db.commit()
+    await db.commit()
+    invalidate_dashboard_stats(class_ids=[enrollment.class_id], user_ids=[enrollment.student_id])
     
     return {"message": "Student removed from class successfully"}
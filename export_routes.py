@@ -0,0 +1,108 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from typing import AsyncIterator, Optional
+from datetime import date, timedelta
+from enum import Enum
+import csv
+import io
+import json
+from database import AsyncReadSessionLocal
+from models import Attendance, Class, User, UserRole
+from auth import require_teacher_or_admin, Principal
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+# Rows fetched from the server-side cursor per round trip
+EXPORT_BATCH_SIZE = 1000
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+Student = aliased(User)
+Teacher = aliased(User)
+
+# Output columns, in order, with the expression each one is read from
+ATTENDANCE_EXPORT_COLUMNS = (
+    ("attendance_id", Attendance.id),
+    ("date", Attendance.date),
+    ("class_id", Attendance.class_id),
+    ("class_name", Class.name),
+    ("teacher_name", Teacher.full_name),
+    ("student_id", Attendance.student_id),
+    ("student_name", Student.full_name),
+    ("student_email", Student.email),
+    ("status", Attendance.status),
+    ("grade", Attendance.grade),
+    ("notes", Attendance.notes),
+)
+COLUMN_NAMES = [name for name, _ in ATTENDANCE_EXPORT_COLUMNS]
+
+def _export_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+def _format_rows(rows, export_format: ExportFormat) -> str:
+    if export_format == ExportFormat.NDJSON:
+        return "".join(
+            json.dumps(dict(zip(COLUMN_NAMES, map(_export_value, row)))) + "\n" for row in rows
+        )
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_export_value(v) for v in row] for row in rows)
+    return buffer.getvalue()
+
+async def _stream_attendance(query, export_format: ExportFormat) -> AsyncIterator[str]:
+    """Encode rows one cursor batch at a time so memory stays flat whatever the export size"""
+    if export_format == ExportFormat.CSV:
+        yield _format_rows([COLUMN_NAMES], export_format)
+    # The session lives as long as the response body, not the request handler
+    async with AsyncReadSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield _format_rows(rows, export_format)
+
+@router.get("/attendance")
+async def export_attendance(
+    format: ExportFormat = ExportFormat.CSV,
+    class_id: Optional[int] = None,
+    student_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: Principal = Depends(require_teacher_or_admin)
+):
+    """Stream attendance records as CSV or NDJSON (teachers get their own classes only)"""
+    query = (
+        select(*[column for _, column in ATTENDANCE_EXPORT_COLUMNS])
+        .join(Class, Attendance.class_id == Class.id)
+        .join(Teacher, Class.teacher_id == Teacher.id)
+        .join(Student, Attendance.student_id == Student.id)
+        .order_by(Attendance.date, Attendance.id)
+    )
+    if current_user.role == UserRole.TEACHER:
+        query = query.where(Class.teacher_id == current_user.id)
+    if class_id:
+        query = query.where(Attendance.class_id == class_id)
+    if student_id:
+        query = query.where(Attendance.student_id == student_id)
+    if start_date:
+        query = query.where(Attendance.date >= start_date)
+    if end_date:
+        # Inclusive of every record taken on end_date
+        query = query.where(Attendance.date < end_date + timedelta(days=1))
+
+    filename = f"attendance_export_{date.today()}.{format.value}"
+    return StreamingResponse(
+        _stream_attendance(query, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -43,6 +43,25 @@ def reset_database():
         traceback.print_exc()
         return False
 
+def upgrade_database():
+    """Apply pending schema migrations without deleting data"""
+    print("Upgrading database in place...")
+    
+    try:
+        from database import create_tables
+        from migrations import run_migrations
+        
+        create_tables()
+        applied = run_migrations()
+        print(f"✓ {len(applied)} migration(s) applied, existing data kept")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Database upgrade failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 def install_missing_packages():
     """Install commonly missing packages"""
     print("Installing missing packages...")
@@ -76,8 +95,9 @@ def main():
     print("1. Reset database (delete and recreate)")
     print("2. Install missing packages")
     print("3. Both (recommended)")
+    print("4. Upgrade schema in place (keeps data)")
     
-    choice = input("\nEnter choice (1-3): ").strip()
+    choice = input("\nEnter choice (1-4): ").strip()
     
     if choice in ["2", "3"]:
         install_missing_packages()
@@ -86,6 +106,9 @@ def main():
     if choice in ["1", "3"]:
         reset_database()
     
+    if choice == "4":
+        upgrade_database()
+    
     print("\nAfter running this script, try:")
     print("  python troubleshoot_db.py")
     print("  python init_database.py")
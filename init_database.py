@@ -11,14 +11,18 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database import create_tables, create_admin_user
+from migrations import run_migrations
 
 def main():
     print("Initializing LMS database...")
     
-    # Create all tables
+    # Create missing tables, then upgrade existing ones in place
     create_tables()
     print("✓ Database tables created")
     
+    run_migrations()
+    print("✓ Schema migrations applied")
+    
     # Create admin user
     create_admin_user()
     print("✓ Admin user setup complete")
@@ -0,0 +1,47 @@
+import inspect
+import json
+from datetime import date, datetime, time
+from enum import Enum
+from typing import Any
+
+from fastapi.datastructures import Default
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+try:
+    import orjson
+except ImportError:  # optional dependency; fall back to the standard library
+    orjson = None
+
+def _default(value: Any):
+    """Encode the non-JSON types our responses carry: datetimes and role/status enums"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        # orjson handles datetime and Enum natively; non-str keys cover id-keyed maps
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when installed, the stdlib json module otherwise"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def default_response_class():
+    """App-wide response class: FastJSONResponse, unless this FastAPI already renders
+    response models straight to JSON bytes with pydantic, which a custom class switches off"""
+    if "dump_json" in inspect.signature(serialize_response).parameters:
+        return Default(JSONResponse)
+    return FastJSONResponse
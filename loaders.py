@@ -0,0 +1,52 @@
+from sqlalchemy.orm import joinedload, selectinload
+from models import Attendance, Class, Enrollment
+
+# Loader options for the relationships nested in the response schemas.
+# List queries use selectinload: each related table is fetched once with an IN
+# over the distinct ids, so a teacher shared by thousands of rows loads once.
+# Single-object loads use joinedload to answer in one round trip.
+
+CLASS_LIST_OPTIONS = (
+    selectinload(Class.teacher),
+)
+CLASS_DETAIL_OPTIONS = (
+    joinedload(Class.teacher),
+)
+
+ENROLLMENT_LIST_OPTIONS = (
+    selectinload(Enrollment.student),
+    selectinload(Enrollment.class_obj).selectinload(Class.teacher),
+)
+ENROLLMENT_DETAIL_OPTIONS = (
+    joinedload(Enrollment.student),
+    joinedload(Enrollment.class_obj).joinedload(Class.teacher),
+)
+
+ATTENDANCE_LIST_OPTIONS = (
+    selectinload(Attendance.student),
+    selectinload(Attendance.class_obj).selectinload(Class.teacher),
+)
+ATTENDANCE_DETAIL_OPTIONS = (
+    joinedload(Attendance.student),
+    joinedload(Attendance.class_obj).joinedload(Class.teacher),
+)
+
+# Relations side-loaded by the fields=/expand= list responses (see sparse.py);
+# only the expanded ones are loaded at all
+ENROLLMENT_EXPANSIONS = {
+    "student": selectinload(Enrollment.student),
+    "class": selectinload(Enrollment.class_obj),
+    "teacher": selectinload(Enrollment.class_obj).selectinload(Class.teacher),
+}
+
+ATTENDANCE_EXPANSIONS = {
+    "student": selectinload(Attendance.student),
+    "class": selectinload(Attendance.class_obj),
+    "teacher": selectinload(Attendance.class_obj).selectinload(Class.teacher),
+}
+
+def list_options(full_options: tuple, expansions: dict, selection) -> tuple:
+    """Loader options for a list query: the full set for nested responses, else just the expanded relations"""
+    if not selection.sparse:
+        return full_options
+    return tuple(expansions[name] for name in sorted(selection.expand))
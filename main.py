@@ -1,18 +1,28 @@
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from database import create_tables, create_admin_user
+from database import create_tables, create_admin_user, get_pool_stats
+from migrations import pending_migrations, run_migrations
+from json_response import default_response_class
+from auth import require_admin, Principal
+from password_hashing import hashing_executor
+from cache import dashboard_stats_cache, principal_cache, token_cache
+from pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
 from auth_routes import router as auth_router
 from class_routes import router as class_router
 from enrollment_routes import router as enrollment_router
 from attendance_routes import router as attendance_router
 from user_routes import router as user_router
 from dashboard_routes import router as dashboard_router
+from export_routes import router as export_router
+from analytics_routes import router as analytics_router
+from student_routes import router as student_router
 
 # Create FastAPI app
 app = FastAPI(
     title="LMS API",
     description="Learning Management System API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=default_response_class()
 )
 
 # Add CORS middleware
@@ -22,6 +32,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER],
 )
 
 # Include routers
@@ -31,11 +42,22 @@ app.include_router(enrollment_router)
 app.include_router(attendance_router)
 app.include_router(user_router)
 app.include_router(dashboard_router)
+app.include_router(export_router)
+app.include_router(analytics_router)
+app.include_router(student_router)
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup"""
     create_tables()
+    # Migrations run once from the command line, never concurrently from each worker;
+    # serving before backfills such as the attendance summary have run would report zeros
+    pending = pending_migrations()
+    if pending:
+        raise RuntimeError(
+            f"{len(pending)} pending schema migration(s); run `python init_database.py` "
+            "or `python migrations.py` before starting the API"
+        )
     create_admin_user()
 
 @app.get("/")
@@ -52,6 +74,28 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/health/db")
+async def database_health(current_user: Principal = Depends(require_admin)):
+    """Connection pool occupancy and checkout wait times"""
+    return get_pool_stats()
+
+@app.get("/health/hashing")
+async def hashing_health(current_user: Principal = Depends(require_admin)):
+    """Password hashing executor load and queue depth"""
+    return hashing_executor.stats()
+
+@app.get("/health/caches")
+async def cache_health(current_user: Principal = Depends(require_admin)):
+    """Hit/miss counters for the in-process caches"""
+    return {
+        "dashboard_stats": dashboard_stats_cache.stats(),
+        "principals": principal_cache.stats(),
+        "tokens": token_cache.stats()
+    }
+
 if __name__ == "__main__":
     import uvicorn
+    # Single process, so it is safe to upgrade the schema here before serving
+    create_tables()
+    run_migrations()
     uvicorn.run(app, host="0.0.0.0", port=8000)
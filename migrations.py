@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for LMS
+Applies ordered migrations in place and records them in schema_migrations,
+so schema changes no longer require deleting lms.db
+
+Usage: python migrations.py [--status] [--batch-size N]
+"""
+
+import argparse
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List
+
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table, func, inspect, select
+from sqlalchemy.schema import CreateIndex
+
+from attendance_summary import rebuild_class_range
+from database import engine
+from models import Base, Class
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Kept out of Base.metadata so create_all never marks migrations as applied
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+    Column("duration_seconds", Float, nullable=False),
+)
+
+@dataclass
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[["MigrationContext"], None]
+
+MIGRATIONS: List[Migration] = []
+
+def migration(version: int, description: str):
+    """Register an upgrade function as a numbered migration"""
+    def register(upgrade):
+        if any(m.version == version for m in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS.append(Migration(version, description, upgrade))
+        return upgrade
+    return register
+
+class MigrationContext:
+    """Operations available to a migration; every step is timed and reported"""
+
+    def __init__(self, target_engine, batch_size: int = DEFAULT_BATCH_SIZE, log: Callable[[str], None] = print):
+        self.engine = target_engine
+        self.batch_size = batch_size
+        self.log = log
+
+    @contextmanager
+    def step(self, name: str):
+        started = time.perf_counter()
+        yield
+        self.log(f"    - {name} ({time.perf_counter() - started:.2f}s)")
+
+    def index_exists(self, table_name: str, index_name: str) -> bool:
+        with self.engine.connect() as conn:
+            return any(ix["name"] == index_name for ix in inspect(conn).get_indexes(table_name))
+
+    def create_index(self, table_name: str, index_name: str):
+        """Create a model index in its own transaction, without blocking writes on PostgreSQL"""
+        index = next(ix for ix in Base.metadata.tables[table_name].indexes if ix.name == index_name)
+        if self.index_exists(table_name, index_name):
+            self.log(f"    - {index_name} already present")
+            return
+
+        with self.step(f"create index {index_name}"):
+            if self.engine.dialect.name == "postgresql":
+                # CONCURRENTLY builds without locking out writers but cannot run inside a transaction
+                ddl = str(CreateIndex(index).compile(dialect=self.engine.dialect))
+                ddl = ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+                with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    conn.exec_driver_sql(ddl)
+            else:
+                with self.engine.begin() as conn:
+                    index.create(conn)
+
+    def create_table(self, table_name: str):
+        """Create a model table if it does not exist yet"""
+        with self.step(f"create table {table_name}"):
+            Base.metadata.tables[table_name].create(self.engine, checkfirst=True)
+
+    def backfill(self, name: str, key_column, apply_batch: Callable[..., None]):
+        """Call apply_batch(conn, low, high) over key ranges of batch_size, committing each batch"""
+        with self.engine.connect() as conn:
+            low, high = conn.execute(select(func.min(key_column), func.max(key_column))).one()
+        if low is None:
+            self.log(f"    - {name}: nothing to backfill")
+            return
+
+        with self.step(f"backfill {name}"):
+            for start in range(low, high + 1, self.batch_size):
+                end = min(start + self.batch_size, high + 1)
+                with self.engine.begin() as conn:
+                    apply_batch(conn, start, end)
+                self.log(f"      {name}: keys {start}-{end - 1} of {high}")
+
+def applied_versions(target_engine) -> set:
+    migration_metadata.create_all(bind=target_engine)
+    with target_engine.connect() as conn:
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+def pending_migrations(target_engine=None) -> List[Migration]:
+    applied = applied_versions(target_engine or engine)
+    return [m for m in sorted(MIGRATIONS, key=lambda m: m.version) if m.version not in applied]
+
+def run_migrations(target_engine=None, batch_size: int = DEFAULT_BATCH_SIZE,
+                   log: Callable[[str], None] = print) -> List[Migration]:
+    """Apply pending migrations in version order and return the ones applied"""
+    target_engine = target_engine or engine
+    context = MigrationContext(target_engine, batch_size, log)
+    applied = []
+    for m in pending_migrations(target_engine):
+        log(f"  Applying migration {m.version:04d}: {m.description}")
+        started = time.perf_counter()
+        m.upgrade(context)
+        duration = time.perf_counter() - started
+        with target_engine.begin() as conn:
+            conn.execute(schema_migrations.insert().values(
+                version=m.version,
+                description=m.description,
+                applied_at=datetime.utcnow(),
+                duration_seconds=duration
+            ))
+        log(f"  ✓ Migration {m.version:04d} applied in {duration:.2f}s")
+        applied.append(m)
+    return applied
+
+# Migrations -----------------------------------------------------------------
+
+@migration(1, "Composite and partial indexes for hot router queries")
+def add_hot_path_indexes(ctx: MigrationContext):
+    ctx.create_index("enrollments", "ix_enrollments_student_class_active")
+    ctx.create_index("enrollments", "ix_enrollments_class_active")
+    ctx.create_index("classes", "ix_classes_teacher_active")
+    ctx.create_index("attendance", "ix_attendance_class_date")
+    ctx.create_index("attendance", "ix_attendance_student_class_date")
+
+@migration(2, "Attendance summary counters per class and student")
+def add_attendance_summary(ctx: MigrationContext):
+    ctx.create_table("attendance_summary")
+    ctx.create_index("attendance_summary", "ix_attendance_summary_student")
+    ctx.backfill("attendance_summary", Class.id, rebuild_class_range)
+
+@migration(3, "Refresh token revocation store")
+def add_refresh_tokens(ctx: MigrationContext):
+    ctx.create_table("refresh_tokens")
+    ctx.create_index("refresh_tokens", "ix_refresh_tokens_family")
+    ctx.create_index("refresh_tokens", "ix_refresh_tokens_user")
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply LMS schema migrations in place")
+    parser.add_argument("--status", action="store_true", help="list pending migrations without applying them")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows per backfill batch")
+    args = parser.parse_args()
+
+    pending = pending_migrations()
+    if args.status:
+        if not pending:
+            print("Schema is up to date")
+        for m in pending:
+            print(f"pending {m.version:04d}: {m.description}")
+        return
+
+    if not pending:
+        print("Schema is up to date")
+        return
+    applied = run_migrations(batch_size=args.batch_size)
+    print(f"\n{len(applied)} migration(s) applied")
+
+if __name__ == "__main__":
+    main()
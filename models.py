@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Boolean, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -42,6 +42,12 @@ class Class(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Boolean, default=True)
     
+    # Partial indexes cover only active rows on SQLite/PostgreSQL, full indexes elsewhere
+    __table_args__ = (
+        Index("ix_classes_teacher_active", teacher_id,
+              sqlite_where=is_active == True, postgresql_where=is_active == True),
+    )
+    
     # Relationships
     teacher = relationship("User", back_populates="taught_classes")
     enrollments = relationship("Enrollment", back_populates="class_obj")
@@ -56,6 +62,13 @@ class Enrollment(Base):
     enrolled_at = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Boolean, default=True)
     
+    __table_args__ = (
+        Index("ix_enrollments_student_class_active", student_id, class_id,
+              sqlite_where=is_active == True, postgresql_where=is_active == True),
+        Index("ix_enrollments_class_active", class_id,
+              sqlite_where=is_active == True, postgresql_where=is_active == True),
+    )
+    
     # Relationships
     student = relationship("User", back_populates="enrollments")
     class_obj = relationship("Class", back_populates="enrollments")
@@ -73,7 +86,44 @@ class Attendance(Base):
     marked_by = Column(Integer, ForeignKey("users.id"))  # Teacher who marked attendance
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        Index("ix_attendance_class_date", class_id, date),
+        Index("ix_attendance_student_class_date", student_id, class_id, date),
+    )
+    
     # Relationships
     student = relationship("User", back_populates="attendance_records", foreign_keys=[student_id])
     class_obj = relationship("Class", back_populates="attendance_records")
     marked_by_user = relationship("User", foreign_keys=[marked_by])
+
+class AttendanceSummary(Base):
+    """Per class/student attendance counters, updated in the same transaction as attendance writes"""
+    __tablename__ = "attendance_summary"
+    
+    class_id = Column(Integer, ForeignKey("classes.id"), primary_key=True)
+    student_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    present_count = Column(Integer, nullable=False, default=0)
+    absent_count = Column(Integer, nullable=False, default=0)
+    tardy_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_attendance_summary_student", student_id),
+    )
+
+class RefreshToken(Base):
+    """Rotating refresh token; only a SHA-256 digest of the token is stored"""
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    token_hash = Column(String, unique=True, nullable=False)
+    family_id = Column(String, nullable=False)  # shared by every token rotated from one login
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime)  # set when rotated, logged out or revoked for reuse
+    
+    __table_args__ = (
+        Index("ix_refresh_tokens_family", family_id),
+        Index("ix_refresh_tokens_user", user_id),
+    )
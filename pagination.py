@@ -0,0 +1,75 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Optional, Sequence
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import Date, DateTime, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+@dataclass
+class PageParams:
+    limit: int
+    cursor: Optional[str]
+    include_total: bool
+
+def page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False
+) -> PageParams:
+    """Query parameters shared by every paginated list endpoint"""
+    return PageParams(limit=limit, cursor=cursor, include_total=include_total)
+
+def encode_cursor(values: Sequence) -> str:
+    payload = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, keys: Sequence) -> list:
+    """Decode an opaque cursor back into values typed like the key columns"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(payload, list) or len(payload) != len(keys):
+            raise ValueError
+        values = []
+        for key, value in zip(keys, payload):
+            if isinstance(key.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(key.type, Date):
+                value = date.fromisoformat(value)
+            elif not isinstance(value, int):
+                raise ValueError
+            values.append(value)
+        return values
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def after(keys: Sequence, values: Sequence):
+    """Rows strictly after `values` in key order; a row-value comparison is a single index range scan"""
+    if len(keys) == 1:
+        return keys[0] > values[0]
+    return tuple_(*keys) > tuple_(*values)
+
+async def paginate(db: AsyncSession, query, keys: Sequence, page: PageParams, response: Response) -> list:
+    """Return one page of `query` ordered by keys (last key unique); sets the cursor and count headers"""
+    if page.include_total:
+        total = await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+        response.headers[TOTAL_COUNT_HEADER] = str(total)
+
+    if page.cursor:
+        query = query.where(after(keys, decode_cursor(page.cursor, keys)))
+
+    # Fetch one extra row to learn whether another page exists
+    result = await db.execute(query.order_by(*keys).limit(page.limit + 1))
+    rows = result.scalars().all()
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(rows[-1], key.key) for key in keys])
+    return rows
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from database import pwd_context
+
+def available_cpus() -> int:
+    """CPUs this process may run on, respecting container and affinity limits"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+class HashingExecutor:
+    """Thread pool for bcrypt work with a cap on queued calls and queue-depth metrics"""
+
+    def __init__(self, workers: int, max_pending: int):
+        # bcrypt releases the GIL, so threads hash in parallel without blocking the event loop
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.workers = workers
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self.pending = 0  # submitted and not finished: running plus queued
+        self.running = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+
+    async def run(self, func: Callable, *args):
+        """Run func(*args) on the pool; 503 when max_pending calls are already waiting or running"""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many concurrent password operations, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            self.pending += 1
+            # Calls beyond the worker count wait in the executor's queue
+            self.max_queue_depth = max(self.max_queue_depth, self.pending - self.workers)
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            with self._lock:
+                self.running += 1
+                self.total_wait += started - submitted
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.total_run += time.perf_counter() - started
+
+        try:
+            return await asyncio.wrap_future(self._executor.submit(timed))
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "running": self.running,
+                "queued": self.pending - self.running,
+                "max_queue_depth": self.max_queue_depth,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait / self.completed * 1000, 2) if self.completed else 0.0,
+                "avg_hash_ms": round(self.total_run / self.completed * 1000, 2) if self.completed else 0.0,
+            }
+
+hashing_executor = HashingExecutor(
+    workers=int(os.getenv("LMS_HASH_WORKERS", str(available_cpus()))),
+    max_pending=int(os.getenv("LMS_HASH_MAX_PENDING", "64"))
+)
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the hashing executor"""
+    return await hashing_executor.run(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also returns a new hash when the stored one uses outdated bcrypt rounds"""
+    return await hashing_executor.run(pwd_context.verify_and_update, plain_password, hashed_password)
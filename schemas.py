@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List
 from models import UserRole, AttendanceStatus
 
@@ -16,6 +16,9 @@ class UserLogin(BaseModel):
     email: EmailStr
     password: str
 
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
 class User(UserBase):
     id: int
     created_at: datetime
@@ -24,6 +27,25 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+class UserWithStats(User):
+    # Only present when the listing is requested with include_stats=true
+    enrolled_class_count: Optional[int] = None
+    last_attendance_date: Optional[datetime] = None
+
+class UserImportError(BaseModel):
+    line: int
+    email: Optional[str] = None
+    error: str
+
+class UserImportReport(BaseModel):
+    rows: int
+    imported: int
+    duplicates: int
+    failed: int
+    elapsed_seconds: float
+    rows_per_second: float
+    errors: List[UserImportError]
+
 # Class schemas
 class ClassBase(BaseModel):
     name: str
@@ -47,6 +69,21 @@ class EnrollmentCreate(BaseModel):
     student_id: int
     class_id: int
 
+class EnrollmentBulkRequest(BaseModel):
+    enrollments: List[EnrollmentCreate]
+
+class EnrollmentBulkResult(BaseModel):
+    student_id: int
+    class_id: int
+    outcome: str  # "enrolled", "removed" or "error"
+    enrollment_id: Optional[int] = None
+    detail: Optional[str] = None
+
+class EnrollmentBulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[EnrollmentBulkResult]
+
 class Enrollment(BaseModel):
     id: int
     student_id: int
@@ -73,6 +110,31 @@ class AttendanceUpdate(BaseModel):
     grade: Optional[int] = None
     notes: Optional[str] = None
 
+class AttendanceBulkRecord(BaseModel):
+    student_id: int
+    status: AttendanceStatus
+    grade: Optional[int] = None
+    notes: Optional[str] = None
+
+class AttendanceBulkCreate(BaseModel):
+    class_id: int
+    date: datetime
+    records: List[AttendanceBulkRecord]
+
+class AttendanceBulkResult(BaseModel):
+    student_id: int
+    outcome: str  # "created", "updated" or "error"
+    attendance_id: Optional[int] = None
+    detail: Optional[str] = None
+
+class AttendanceBulkResponse(BaseModel):
+    class_id: int
+    date: datetime
+    created: int
+    updated: int
+    failed: int
+    results: List[AttendanceBulkResult]
+
 class Attendance(BaseModel):
     id: int
     student_id: int
@@ -104,3 +166,58 @@ class ClassStats(BaseModel):
     class_name: str
     total_students: int
     attendance_stats: AttendanceStats
+
+# Analytics schemas
+class DailyAttendance(BaseModel):
+    date: date
+    present: int
+    absent: int
+    tardy: int
+    total: int
+
+class ClassAttendanceRate(BaseModel):
+    class_id: int
+    class_name: str
+    teacher_name: str
+    present: int
+    absent: int
+    tardy: int
+    total: int
+    attendance_rate: float
+
+class ClassOverview(BaseModel):
+    class_id: int
+    class_name: str
+    teacher_id: int
+    teacher_name: str
+    teacher_email: str
+    created_at: datetime
+    is_active: bool
+    enrollment_count: int
+    attendance_records: int
+    attendance_rate: Optional[float] = None  # None until attendance is taken
+
+class TeacherWorkload(BaseModel):
+    teacher_id: int
+    teacher_name: str
+    class_count: int
+    enrollment_count: int
+    student_count: int  # distinct students across the teacher's classes
+
+class ClassOverviewReport(BaseModel):
+    classes: List[ClassOverview]
+    teachers: List[TeacherWorkload]
+
+class StudentClassSummary(BaseModel):
+    class_id: int
+    class_name: str
+    description: Optional[str] = None
+    created_at: datetime
+    teacher_id: int
+    teacher_name: str
+    teacher_email: str
+    total_sessions: int
+    present_count: int
+    absent_count: int
+    tardy_count: int
+    attendance_rate: Optional[float] = None  # None until attendance is taken
@@ -1,7 +1,17 @@
 import streamlit as st
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, BinaryIO, Iterator
 import requests
 import json
+import time
+
+# Items requested per page when walking a paginated list endpoint
+PAGE_SIZE = 500
+
+# Renew the access token this many seconds before it expires
+TOKEN_REFRESH_MARGIN = 60
+
+class PageFetchError(Exception):
+    """A page of a paginated list endpoint could not be fetched"""
 
 class SessionManager:
     """Manage user sessions in Streamlit"""
@@ -15,6 +25,17 @@ class SessionManager:
             st.session_state.user = None
         if 'token' not in st.session_state:
             st.session_state.token = None
+        if 'refresh_token' not in st.session_state:
+            st.session_state.refresh_token = None
+        if 'token_expires_at' not in st.session_state:
+            st.session_state.token_expires_at = 0.0
+    
+    @staticmethod
+    def store_tokens(data: Dict[str, Any]):
+        """Keep the tokens from a login or refresh response"""
+        st.session_state.token = data["access_token"]
+        st.session_state.refresh_token = data.get("refresh_token")
+        st.session_state.token_expires_at = time.time() + data.get("expires_in", 0)
     
     @staticmethod
     def login(email: str, password: str, api_base_url: str = "http://localhost:8000") -> bool:
@@ -29,7 +50,7 @@ class SessionManager:
                 data = response.json()
                 st.session_state.authenticated = True
                 st.session_state.user = data["user"]
-                st.session_state.token = data["access_token"]
+                SessionManager.store_tokens(data)
                 return True
             else:
                 return False
@@ -60,11 +81,45 @@ class SessionManager:
             return False
     
     @staticmethod
-    def logout():
-        """Logout user and clear session"""
+    def refresh_session(api_base_url: str = "http://localhost:8000") -> bool:
+        """Swap the refresh token for a new token pair; ends the session if it was revoked"""
+        refresh_token = st.session_state.get('refresh_token')
+        if not refresh_token:
+            return False
+        try:
+            response = requests.post(
+                f"{api_base_url}/auth/refresh",
+                json={"refresh_token": refresh_token}
+            )
+        except Exception as e:
+            st.error(f"Session refresh error: {str(e)}")
+            return False
+        
+        if response.status_code != 200:
+            SessionManager.clear_session()
+            return False
+        SessionManager.store_tokens(response.json())
+        return True
+    
+    @staticmethod
+    def clear_session():
+        """Forget the user and tokens"""
         st.session_state.authenticated = False
         st.session_state.user = None
         st.session_state.token = None
+        st.session_state.refresh_token = None
+        st.session_state.token_expires_at = 0.0
+    
+    @staticmethod
+    def logout(api_base_url: str = "http://localhost:8000"):
+        """Logout user, revoke the refresh token and clear session"""
+        refresh_token = st.session_state.get('refresh_token')
+        if refresh_token:
+            try:
+                requests.post(f"{api_base_url}/auth/logout", json={"refresh_token": refresh_token})
+            except Exception:
+                pass  # the local session is cleared regardless
+        SessionManager.clear_session()
     
     @staticmethod
     def is_authenticated() -> bool:
@@ -77,8 +132,11 @@ class SessionManager:
         return st.session_state.get('user')
     
     @staticmethod
-    def get_token() -> Optional[str]:
-        """Get current access token"""
+    def get_token(api_base_url: str = "http://localhost:8000") -> Optional[str]:
+        """Get current access token, refreshing it silently shortly before it expires"""
+        token = st.session_state.get('token')
+        if token and time.time() >= st.session_state.get('token_expires_at', 0.0) - TOKEN_REFRESH_MARGIN:
+            SessionManager.refresh_session(api_base_url)
         return st.session_state.get('token')
     
     @staticmethod
@@ -106,7 +164,7 @@ class SessionManager:
     @staticmethod
     def make_authenticated_request(url: str, method: str = "GET", data: dict = None, api_base_url: str = "http://localhost:8000"):
         """Make authenticated API request"""
-        token = SessionManager.get_token()
+        token = SessionManager.get_token(api_base_url)
         if not token:
             return None
         
@@ -128,3 +186,47 @@ class SessionManager:
         except Exception as e:
             st.error(f"API request error: {str(e)}")
             return None
+    
+    @staticmethod
+    def download(url: str, destination: BinaryIO, api_base_url: str = "http://localhost:8000") -> bool:
+        """Stream a response body into a file without holding it in memory"""
+        token = SessionManager.get_token(api_base_url)
+        if not token:
+            return False
+        
+        try:
+            with requests.get(f"{api_base_url}{url}", headers={"Authorization": f"Bearer {token}"}, stream=True) as response:
+                if response.status_code != 200:
+                    return False
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    destination.write(chunk)
+            destination.seek(0)
+            return True
+        except Exception as e:
+            st.error(f"Download error: {str(e)}")
+            return False
+    
+    @staticmethod
+    def iter_pages(url: str, page_size: int = PAGE_SIZE, api_base_url: str = "http://localhost:8000") -> Iterator[Dict[Any, Any]]:
+        """Yield items from a paginated list endpoint, fetching each page only when it is reached"""
+        separator = "&" if "?" in url else "?"
+        cursor = None
+        while True:
+            page_url = f"{url}{separator}limit={page_size}"
+            if cursor:
+                page_url += f"&cursor={cursor}"
+            response = SessionManager.make_authenticated_request(page_url, api_base_url=api_base_url)
+            if not response or response.status_code != 200:
+                raise PageFetchError(f"Failed to fetch {url}")
+            yield from response.json()
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return
+    
+    @staticmethod
+    def get_all_pages(url: str, api_base_url: str = "http://localhost:8000") -> Optional[list]:
+        """Collect every page of a list endpoint; None if any page fails"""
+        try:
+            return list(SessionManager.iter_pages(url, api_base_url=api_base_url))
+        except PageFetchError:
+            return None
@@ -14,11 +14,16 @@ def setup_database():
     
     try:
         from database import create_tables, create_admin_user
+        from migrations import run_migrations
         
         # Create tables
         create_tables()
         print("✅ Database tables created successfully")
         
+        # Upgrade an existing database in place
+        run_migrations()
+        print("✅ Schema migrations applied")
+        
         # Create admin user
         create_admin_user()
         print("✅ Admin user created successfully")
@@ -0,0 +1,110 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from fastapi import HTTPException, Query, Response
+
+from json_response import FastJSONResponse
+from pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+from schemas import Attendance as AttendanceSchema, Class as ClassSchema, Enrollment as EnrollmentSchema, User as UserSchema
+
+RELATION_FIELDS = {"student", "class_obj", "teacher"}
+
+def scalar_fields(schema) -> Tuple[str, ...]:
+    return tuple(name for name in schema.model_fields if name not in RELATION_FIELDS)
+
+# Fields serialized for each side-loaded collection in `included`
+INCLUDED_FIELDS = {
+    "users": scalar_fields(UserSchema),
+    "classes": scalar_fields(ClassSchema),
+}
+
+# OpenAPI description for list routes whose response_model only describes the default shape
+SPARSE_RESPONSES = {
+    200: {
+        "description": (
+            "Without `fields` or `expand`: a list of full records as in the schema below. "
+            "With either: `{\"data\": [...], \"included\": {collection: {id: object}}}`, where each "
+            "`data` row holds only `id` and the selected fields, and `included` holds side-loaded objects"
+        )
+    }
+}
+
+@dataclass(frozen=True)
+class FieldSelection:
+    fields: Tuple[str, ...]
+    expand: FrozenSet[str]
+    sparse: bool  # False when neither parameter was given: respond with the nested schema
+
+@dataclass(frozen=True)
+class SparseResource:
+    """Row fields and side-loadable relations of a list endpoint"""
+    fields: Tuple[str, ...]
+    # expand name -> row -> (included collection, related object)
+    sideloads: Dict[str, Callable]
+
+    def _parse(self, value: Optional[str], allowed: Iterable[str], parameter: str) -> list:
+        names = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = sorted(set(names) - set(allowed))
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown {parameter}: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+            )
+        return names
+
+    def selection(self, fields: Optional[str], expand: Optional[str]) -> FieldSelection:
+        if fields is None and expand is None:
+            return FieldSelection(fields=self.fields, expand=frozenset(), sparse=False)
+        selected = self.fields
+        if fields is not None:
+            names = self._parse(fields, self.fields, "fields")
+            # id is always returned so rows stay addressable
+            selected = tuple(dict.fromkeys(["id", *names]))
+        expanded = frozenset(self._parse(expand, self.sideloads, "expand")) if expand else frozenset()
+        return FieldSelection(fields=selected, expand=expanded, sparse=True)
+
+def field_selection(resource: SparseResource):
+    """Dependency parsing the fields= and expand= query parameters for a resource"""
+    def dependency(
+        fields: Optional[str] = Query(None, description=f"Comma-separated subset of: {', '.join(resource.fields)}"),
+        expand: Optional[str] = Query(None, description=f"Side-load into `included`: {', '.join(resource.sideloads)}")
+    ) -> FieldSelection:
+        return resource.selection(fields, expand)
+    return dependency
+
+ATTENDANCE_RESOURCE = SparseResource(
+    fields=scalar_fields(AttendanceSchema),
+    sideloads={
+        "student": lambda row: ("users", row.student),
+        "class": lambda row: ("classes", row.class_obj),
+        "teacher": lambda row: ("users", row.class_obj.teacher),
+    }
+)
+
+ENROLLMENT_RESOURCE = SparseResource(
+    fields=scalar_fields(EnrollmentSchema),
+    sideloads={
+        "student": lambda row: ("users", row.student),
+        "class": lambda row: ("classes", row.class_obj),
+        "teacher": lambda row: ("users", row.class_obj.teacher),
+    }
+)
+
+def sparse_response(rows: list, selection: FieldSelection, resource: SparseResource,
+                    response: Optional[Response] = None) -> FastJSONResponse:
+    """Flat rows under `data`, each related object once under `included[collection][id]`"""
+    data = [{name: getattr(row, name) for name in selection.fields} for row in rows]
+    included = {}
+    for name in sorted(selection.expand):
+        for row in rows:
+            collection, obj = resource.sideloads[name](row)
+            objects = included.setdefault(collection, {})
+            if obj.id not in objects:
+                objects[obj.id] = {field: getattr(obj, field) for field in INCLUDED_FIELDS[collection]}
+
+    headers = {}
+    if response is not None:
+        # Pagination headers set on the injected response are not carried over to a returned Response
+        headers = {h: response.headers[h] for h in (NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER) if h in response.headers}
+    # Rows hold raw datetimes and enums; the response class encodes them without a jsonable_encoder pass
+    return FastJSONResponse({"data": data, "included": included}, headers=headers)
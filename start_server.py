@@ -15,6 +15,8 @@ def start_fastapi():
     """Start FastAPI server"""
     print("🚀 Starting FastAPI server...")
     try:
+        # Apply schema migrations once, before the API workers start
+        subprocess.run([sys.executable, "init_database.py"], check=True)
         subprocess.run([
             sys.executable, "-m", "uvicorn", 
             "main:app", 
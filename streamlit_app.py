@@ -4,17 +4,13 @@ import pandas as pd
 from datetime import datetime, date
 import json
 from typing import Optional, Dict, Any
+from session_manager import SessionManager
 
 # Configuration
 API_BASE_URL = "http://localhost:8000"
 
-# Session state initialization
-if 'authenticated' not in st.session_state:
-    st.session_state.authenticated = False
-if 'user' not in st.session_state:
-    st.session_state.user = None
-if 'token' not in st.session_state:
-    st.session_state.token = None
+# Session state initialization (tokens are kept the same way as in app.py)
+SessionManager.init_session()
 
 class LMSClient:
     """Client for interacting with the LMS API"""
@@ -60,10 +56,23 @@ class LMSClient:
         )
         return response.json() if response.status_code == 200 else None
     
+    def get_all_pages(self, url: str, page_size: int = 500) -> list:
+        """Follow X-Next-Cursor headers until a paginated list endpoint is exhausted"""
+        items = []
+        params = {"limit": page_size}
+        while True:
+            response = requests.get(url, headers=self.headers, params=params)
+            if response.status_code != 200:
+                return items
+            items.extend(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return items
+            params["cursor"] = cursor
+    
     def get_classes(self) -> list:
         """Get all classes"""
-        response = requests.get(f"{self.base_url}/classes", headers=self.headers)
-        return response.json() if response.status_code == 200 else []
+        return self.get_all_pages(f"{self.base_url}/classes")
     
     def create_class(self, name: str, description: str = "") -> Dict[str, Any]:
         """Create new class"""
@@ -132,14 +141,20 @@ class LMSClient:
         url = f"{self.base_url}/users"
         if role:
             url += f"?role={role}"
-        response = requests.get(url, headers=self.headers)
-        return response.json() if response.status_code == 200 else []
+        return self.get_all_pages(url)
     
     def get_dashboard_stats(self) -> Dict[str, Any]:
         """Get dashboard statistics"""
         response = requests.get(f"{self.base_url}/dashboard/stats", headers=self.headers)
         return response.json() if response.status_code == 200 else {}
 
+def authenticated_client() -> LMSClient:
+    """Client with an access token refreshed shortly before expiry; back to login if the session was revoked"""
+    token = SessionManager.get_token(API_BASE_URL)
+    if not token:
+        st.rerun()
+    return LMSClient(API_BASE_URL, token)
+
 def login_page():
     """Login page"""
     st.title("🎓 Learning Management System")
@@ -167,7 +182,7 @@ def login_page():
                 if result and "access_token" in result:
                     st.session_state.authenticated = True
                     st.session_state.user = result["user"]
-                    st.session_state.token = result["access_token"]
+                    SessionManager.store_tokens(result)
                     st.success("Login successful!")
                     st.rerun()
                 elif result and "error" in result:
@@ -197,7 +212,7 @@ def admin_dashboard():
     """Admin dashboard"""
     st.title("👨‍💼 Admin Dashboard")
     
-    client = LMSClient(API_BASE_URL, st.session_state.token)
+    client = authenticated_client()
     
     # Dashboard stats
     stats = client.get_dashboard_stats()
@@ -260,7 +275,7 @@ def teacher_dashboard():
     """Teacher dashboard"""
     st.title("👨‍🏫 Teacher Dashboard")
     
-    client = LMSClient(API_BASE_URL, st.session_state.token)
+    client = authenticated_client()
     
     # Get teacher's classes
     classes = client.get_classes()
@@ -351,7 +366,7 @@ def student_dashboard():
     """Student dashboard"""
     st.title("👨‍🎓 Student Dashboard")
     
-    client = LMSClient(API_BASE_URL, st.session_state.token)
+    client = authenticated_client()
     
     # Get student's enrollments
     enrollments = client.get_enrollments()
@@ -420,9 +435,7 @@ def main():
             st.write(f"Role: {st.session_state.user['role'].title()}")
             
             if st.button("Logout"):
-                st.session_state.authenticated = False
-                st.session_state.user = None
-                st.session_state.token = None
+                SessionManager.logout(API_BASE_URL)
                 st.rerun()
         else:
             st.write("Please login to continue")
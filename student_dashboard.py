@@ -178,44 +178,33 @@ def show_my_classes():
     st.title("My Classes")
     st.markdown("---")
     
-    # Get enrolled classes
-    response = SessionManager.make_authenticated_request("/classes/")
+    user = SessionManager.get_user()
+    if not user:
+        st.error("User session not found.")
+        return
+    
+    # Enrolled classes with per-class attendance counts in one request
+    response = SessionManager.make_authenticated_request(f"/students/{user['id']}/class-summary")
     if response and response.status_code == 200:
         classes = response.json()
         
         if classes:
             for class_obj in classes:
-                with st.expander(f"📚 {class_obj['name']}", expanded=True):
+                with st.expander(f"📚 {class_obj['class_name']}", expanded=True):
                     col1, col2 = st.columns([2, 1])
                     
                     with col1:
-                        st.write(f"**Description:** {class_obj.get('description', 'No description available')}")
-                        st.write(f"**Teacher:** {class_obj['teacher']['full_name']}")
-                        st.write(f"**Teacher Email:** {class_obj['teacher']['email']}")
+                        st.write(f"**Description:** {class_obj.get('description') or 'No description available'}")
+                        st.write(f"**Teacher:** {class_obj['teacher_name']}")
+                        st.write(f"**Teacher Email:** {class_obj['teacher_email']}")
                         st.write(f"**Class Created:** {class_obj['created_at'][:10]}")
                     
                     with col2:
-                        # Get class-specific attendance stats
-                        user = SessionManager.get_user()
-                        if user:
-                            attendance_response = SessionManager.make_authenticated_request(
-                                f"/attendance/student/{user['id']}?class_id={class_obj['id']}"
-                            )
-                            
-                            if attendance_response and attendance_response.status_code == 200:
-                                attendance_records = attendance_response.json()
-                                
-                                if attendance_records:
-                                    total_sessions = len(attendance_records)
-                                    present_count = len([r for r in attendance_records if r['status'] == 'present'])
-                                    attendance_rate = (present_count / total_sessions * 100) if total_sessions > 0 else 0
-                                    
-                                    st.metric("Sessions Attended", f"{present_count}/{total_sessions}")
-                                    st.metric("Attendance Rate", f"{attendance_rate:.1f}%")
-                                else:
-                                    st.info("No attendance records yet")
-                            else:
-                                st.info("Unable to load attendance data")
+                        if class_obj['total_sessions']:
+                            st.metric("Sessions Attended", f"{class_obj['present_count']}/{class_obj['total_sessions']}")
+                            st.metric("Attendance Rate", f"{class_obj['attendance_rate']:.1f}%")
+                        else:
+                            st.info("No attendance records yet")
         else:
             st.info("You're not enrolled in any classes yet. Contact your teacher to get enrolled.")
     else:
@@ -229,12 +218,11 @@ def show_attendance_records():
     st.markdown("---")
     
     # Get student's classes for filtering
-    classes_response = SessionManager.make_authenticated_request("/classes/")
-    if not classes_response or classes_response.status_code != 200:
+    classes = SessionManager.get_all_pages("/classes/")
+    if classes is None:
         st.error("Failed to load classes.")
         return
     
-    classes = classes_response.json()
     if not classes:
         st.info("You're not enrolled in any classes yet.")
         return
@@ -264,10 +252,9 @@ def show_attendance_records():
     if selected_class != "All Classes" and class_options[selected_class]:
         params += f"&class_id={class_options[selected_class]}"
     
-    response = SessionManager.make_authenticated_request(f"/attendance/student/{user['id']}{params}")
+    attendance_records = SessionManager.get_all_pages(f"/attendance/student/{user['id']}{params}")
     
-    if response and response.status_code == 200:
-        attendance_records = response.json()
+    if attendance_records is not None:
         
         if attendance_records:
             # Create tabs for different views
@@ -436,10 +423,9 @@ def show_grades():
         st.error("User session not found.")
         return
     
-    response = SessionManager.make_authenticated_request(f"/attendance/student/{user['id']}")
+    attendance_records = SessionManager.get_all_pages(f"/attendance/student/{user['id']}")
     
-    if response and response.status_code == 200:
-        attendance_records = response.json()
+    if attendance_records is not None:
         
         # Filter records that have grades
         graded_records = [r for r in attendance_records if r.get('grade') is not None]
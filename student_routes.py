@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from typing import List
+from database import get_read_db
+from models import User, Class, Enrollment, AttendanceSummary, UserRole
+from schemas import StudentClassSummary
+from auth import get_current_active_user, Principal
+
+router = APIRouter(prefix="/students", tags=["students"])
+
+@router.get("/{student_id}/class-summary", response_model=List[StudentClassSummary])
+async def get_student_class_summary(
+    student_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """Enrolled classes with teacher and the student's attendance counts (teachers get their own classes only)"""
+    if current_user.role == UserRole.STUDENT and current_user.id != student_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    student = await db.get(User, student_id)
+    if not student or student.role != UserRole.STUDENT:
+        raise HTTPException(status_code=404, detail="Student not found")
+    
+    # IN rather than a join, so a duplicated enrollment cannot list a class twice
+    enrolled_class_ids = select(Enrollment.class_id).where(
+        Enrollment.student_id == student_id,
+        Enrollment.is_active == True
+    )
+    present = func.coalesce(AttendanceSummary.present_count, 0)
+    absent = func.coalesce(AttendanceSummary.absent_count, 0)
+    tardy = func.coalesce(AttendanceSummary.tardy_count, 0)
+    query = (
+        select(
+            Class.id.label("class_id"),
+            Class.name.label("class_name"),
+            Class.description,
+            Class.created_at,
+            Class.teacher_id,
+            User.full_name.label("teacher_name"),
+            User.email.label("teacher_email"),
+            (present + absent + tardy).label("total_sessions"),
+            present.label("present_count"),
+            absent.label("absent_count"),
+            tardy.label("tardy_count")
+        )
+        .join(User, Class.teacher_id == User.id)
+        # The summary holds one pre-aggregated row per class and student
+        .outerjoin(AttendanceSummary, (AttendanceSummary.class_id == Class.id) & (AttendanceSummary.student_id == student_id))
+        .where(Class.id.in_(enrolled_class_ids), Class.is_active == True)
+        .order_by(Class.name, Class.id)
+    )
+    if current_user.role == UserRole.TEACHER:
+        query = query.where(Class.teacher_id == current_user.id)
+    
+    result = await db.execute(query)
+    return [
+        {
+            **row._asdict(),
+            "attendance_rate": round(row.present_count / row.total_sessions * 100, 1) if row.total_sessions else None
+        }
+        for row in result.all()
+    ]
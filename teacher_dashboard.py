@@ -139,9 +139,8 @@ def show_class_management():
         st.subheader("My Classes")
         
         # Get teacher's classes
-        response = SessionManager.make_authenticated_request("/classes/")
-        if response and response.status_code == 200:
-            classes = response.json()
+        classes = SessionManager.get_all_pages("/classes/")
+        if classes is not None:
             
             if classes:
                 for class_obj in classes:
@@ -196,9 +195,8 @@ def show_class_management():
         st.subheader("Edit Classes")
         
         # Get classes for editing
-        response = SessionManager.make_authenticated_request("/classes/")
-        if response and response.status_code == 200:
-            classes = response.json()
+        classes = SessionManager.get_all_pages("/classes/")
+        if classes is not None:
             
             if classes:
                 class_options = {f"{c['name']} (ID: {c['id']})": c['id'] for c in classes}
@@ -242,12 +240,11 @@ def show_student_enrollment():
     st.markdown("---")
     
     # Get teacher's classes
-    classes_response = SessionManager.make_authenticated_request("/classes/")
-    if not classes_response or classes_response.status_code != 200:
+    classes = SessionManager.get_all_pages("/classes/")
+    if classes is None:
         st.error("Failed to load classes.")
         return
     
-    classes = classes_response.json()
     if not classes:
         st.warning("You need to create at least one class before enrolling students.")
         return
@@ -259,9 +256,8 @@ def show_student_enrollment():
         st.subheader("Enroll New Student")
         
         # Get available students
-        students_response = SessionManager.make_authenticated_request("/users/students")
-        if students_response and students_response.status_code == 200:
-            students = students_response.json()
+        students = SessionManager.get_all_pages("/users/students")
+        if students is not None:
             
             if students:
                 with st.form("enroll_student_form"):
@@ -309,9 +305,8 @@ def show_student_enrollment():
             class_id = class_options[selected_class_name]
             
             # Get enrollments for selected class
-            response = SessionManager.make_authenticated_request(f"/enrollments/class/{class_id}")
-            if response and response.status_code == 200:
-                enrollments = response.json()
+            enrollments = SessionManager.get_all_pages(f"/enrollments/class/{class_id}")
+            if enrollments is not None:
                 
                 if enrollments:
                     # Display enrollments in a nice format
@@ -366,12 +361,11 @@ def show_attendance_management():
     st.markdown("---")
     
     # Get teacher's classes
-    classes_response = SessionManager.make_authenticated_request("/classes/")
-    if not classes_response or classes_response.status_code != 200:
+    classes = SessionManager.get_all_pages("/classes/")
+    if classes is None:
         st.error("Failed to load classes.")
         return
     
-    classes = classes_response.json()
     if not classes:
         st.warning("You need to create classes and enroll students first.")
         return
@@ -396,9 +390,8 @@ def show_attendance_management():
             class_id = class_options[selected_class]
             
             # Get enrolled students
-            response = SessionManager.make_authenticated_request(f"/enrollments/class/{class_id}")
-            if response and response.status_code == 200:
-                enrollments = response.json()
+            enrollments = SessionManager.get_all_pages(f"/enrollments/class/{class_id}")
+            if enrollments is not None:
                 
                 if enrollments:
                     st.subheader(f"Students in {selected_class}")
@@ -452,42 +445,38 @@ def show_attendance_management():
                             error_count = 0
                             error_details = []  # Added to collect specific error messages
                             
-                            for data in attendance_data:
-                                attendance_datetime = datetime.combine(attendance_date, datetime.min.time())
-                                
-                                attendance_record = {
-                                    "student_id": data["student_id"],
+                            attendance_datetime = datetime.combine(attendance_date, datetime.min.time())
+                            student_names = {e['student']['id']: e['student']['full_name'] for e in enrollments}
+                            
+                            # Save the whole roll call in one request and transaction
+                            response = SessionManager.make_authenticated_request(
+                                "/attendance/bulk",
+                                method="POST",
+                                data={
                                     "class_id": class_id,
                                     "date": attendance_datetime.isoformat(),
-                                    "status": data["status"],
-                                    "grade": data["grade"],
-                                    "notes": data["notes"]
+                                    "records": attendance_data
                                 }
-                                
-                                response = SessionManager.make_authenticated_request(
-                                    "/attendance/",
-                                    method="POST",
-                                    data=attendance_record
-                                )
-                                
-                                if response and response.status_code == 200:
-                                    success_count += 1
-                                else:
-                                    error_count += 1
-                                    if response:
-                                        try:
-                                            error_msg = response.json().get("detail", f"HTTP {response.status_code}")
-                                        except:
-                                            error_msg = f"HTTP {response.status_code}"
+                            )
+                            
+                            if response and response.status_code == 200:
+                                for row in response.json()["results"]:
+                                    if row["outcome"] == "error":
+                                        error_count += 1
+                                        student_name = student_names.get(row["student_id"], "Unknown Student")
+                                        error_details.append(f"{student_name}: {row['detail']}")
                                     else:
-                                        error_msg = "No response from server"
-                                    
-                                    student_name = next(
-                                        (e['student']['full_name'] for e in enrollments 
-                                         if e['student']['id'] == data["student_id"]), 
-                                        "Unknown Student"
-                                    )
-                                    error_details.append(f"{student_name}: {error_msg}")
+                                        success_count += 1
+                            else:
+                                error_count = len(attendance_data)
+                                if response:
+                                    try:
+                                        error_msg = response.json().get("detail", f"HTTP {response.status_code}")
+                                    except:
+                                        error_msg = f"HTTP {response.status_code}"
+                                else:
+                                    error_msg = "No response from server"
+                                error_details.append(error_msg)
                             
                             if success_count > 0:
                                 st.success(f"Attendance saved for {success_count} students!")
@@ -525,10 +514,9 @@ def show_attendance_management():
             
             # Get attendance records
             params = f"?start_date={start_date}&end_date={end_date}"
-            response = SessionManager.make_authenticated_request(f"/attendance/class/{class_id}{params}")
+            attendance_records = SessionManager.get_all_pages(f"/attendance/class/{class_id}{params}")
             
-            if response and response.status_code == 200:
-                attendance_records = response.json()
+            if attendance_records is not None:
                 
                 if attendance_records:
                     # Create DataFrame
@@ -578,10 +566,9 @@ def show_attendance_management():
             class_id = class_options[selected_class]
             
             # Get attendance data for visualization
-            response = SessionManager.make_authenticated_request(f"/attendance/class/{class_id}")
+            attendance_records = SessionManager.get_all_pages(f"/attendance/class/{class_id}")
             
-            if response and response.status_code == 200:
-                attendance_records = response.json()
+            if attendance_records is not None:
                 
                 if attendance_records and len(attendance_records) > 0:
                     # Create visualizations
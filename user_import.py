@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Bulk CSV user import for LMS
+Streams a CSV with email, full_name, role and password columns, hashes
+passwords in a process pool and inserts users in chunks
+
+Usage: python user_import.py users.csv [--chunk-size N] [--workers N]
+"""
+
+import argparse
+import csv
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Optional, TextIO
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, hash_password
+from password_hashing import available_cpus
+from models import User, UserRole
+from schemas import UserCreate
+
+DEFAULT_CHUNK_SIZE = 500
+REQUIRED_COLUMNS = {"email", "full_name", "role", "password"}
+
+# worker count -> pool; an import already running keeps its pool when another asks for a different size
+_hash_pools: Dict[int, ProcessPoolExecutor] = {}
+
+def get_hash_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared process pool for bcrypt hashing with the given number of worker processes"""
+    if workers not in _hash_pools:
+        # spawn avoids forking a process that already runs event loop and driver threads
+        _hash_pools[workers] = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _hash_pools[workers]
+
+class ImportReport:
+    """Running totals for an import; passed to the progress callback after each chunk"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.errors = []
+
+    def add_error(self, line: int, email: Optional[str], error: str):
+        self.errors.append({"line": line, "email": email, "error": error})
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> dict:
+        elapsed = self.elapsed
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "duplicates": self.duplicates,
+            "failed": len(self.errors),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed > 0 else 0.0,
+            "errors": self.errors
+        }
+
+def _validate_row(line: int, row: dict, report: ImportReport) -> Optional[UserCreate]:
+    email = (row.get("email") or "").strip()
+    try:
+        user = UserCreate(
+            email=email,
+            full_name=(row.get("full_name") or "").strip(),
+            role=(row.get("role") or "").strip().lower(),
+            password=row.get("password") or ""
+        )
+    except ValidationError as e:
+        fields = ", ".join(str(err["loc"][0]) for err in e.errors())
+        report.add_error(line, email or None, f"Invalid value for: {fields}")
+        return None
+    if user.role == UserRole.ADMIN:
+        report.add_error(line, user.email, "Admin accounts cannot be imported")
+        return None
+    if not user.full_name or not user.password:
+        report.add_error(line, user.email, "full_name and password are required")
+        return None
+    return user
+
+def _insert_rows_individually(db: Session, rows: list, report: ImportReport) -> int:
+    """Fallback when a chunk insert hits a unique violation: insert row by row, reporting each failure"""
+    imported = 0
+    for line, values in rows:
+        try:
+            db.execute(insert(User), [values])
+            db.commit()
+            imported += 1
+        except IntegrityError:
+            db.rollback()
+            report.duplicates += 1
+            report.add_error(line, values["email"], "Email already registered")
+    return imported
+
+def _import_chunk(db: Session, chunk: list, seen: set, report: ImportReport, pool: ProcessPoolExecutor,
+                  workers: int):
+    """Deduplicate a chunk against the file and the database, hash in parallel, insert"""
+    emails = [user.email for _, user in chunk]
+    existing = set(db.execute(select(User.email).where(User.email.in_(emails))).scalars())
+
+    pending = []
+    for line, user in chunk:
+        if user.email in existing or user.email in seen:
+            report.duplicates += 1
+            report.add_error(line, user.email, "Email already registered")
+            continue
+        seen.add(user.email)
+        pending.append((line, user))
+    if not pending:
+        return
+
+    hashes = pool.map(hash_password, [user.password for _, user in pending],
+                      chunksize=max(1, len(pending) // (workers * 4)))
+    rows = [
+        (line, {
+            "email": user.email,
+            "hashed_password": hashed,
+            "full_name": user.full_name,
+            "role": user.role
+        })
+        for (line, user), hashed in zip(pending, hashes)
+    ]
+    try:
+        db.execute(insert(User), [values for _, values in rows])
+        db.commit()
+        report.imported += len(rows)
+    except IntegrityError:
+        # Another signup or import registered one of these emails after the duplicate check
+        db.rollback()
+        report.imported += _insert_rows_individually(db, rows, report)
+
+def import_users(csv_file: TextIO, db: Optional[Session] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 workers: Optional[int] = None,
+                 progress: Optional[Callable[[ImportReport], None]] = None) -> dict:
+    """Stream users from a CSV file into the database; returns the final report"""
+    report = ImportReport()
+    reader = csv.DictReader(csv_file)
+    missing = REQUIRED_COLUMNS - set(reader.fieldnames or [])
+    if missing:
+        report.add_error(1, None, f"Missing columns: {', '.join(sorted(missing))}")
+        return report.as_dict()
+
+    owns_session = db is None
+    db = db or SessionLocal()
+    workers = workers or available_cpus()
+    pool = get_hash_pool(workers)
+    seen = set()
+    try:
+        chunk = []
+        # Header is line 1, so data rows start at line 2
+        for line, row in enumerate(reader, start=2):
+            report.rows += 1
+            user = _validate_row(line, row, report)
+            if user:
+                chunk.append((line, user))
+            if len(chunk) >= chunk_size:
+                _import_chunk(db, chunk, seen, report, pool, workers)
+                chunk = []
+                if progress:
+                    progress(report)
+        if chunk:
+            _import_chunk(db, chunk, seen, report, pool, workers)
+        if progress:
+            progress(report)
+    finally:
+        if owns_session:
+            db.close()
+    return report.as_dict()
+
+def _print_progress(report: ImportReport):
+    rate = report.rows / report.elapsed if report.elapsed > 0 else 0
+    print(f"  {report.rows} rows read, {report.imported} imported, "
+          f"{len(report.errors)} errors ({rate:.0f} rows/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Import users from a CSV file")
+    parser.add_argument("csv_path", help="CSV with email, full_name, role and password columns")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per insert batch")
+    parser.add_argument("--workers", type=int, default=None, help="hashing processes (default: CPU count)")
+    args = parser.parse_args()
+
+    print(f"Importing users from {args.csv_path}...")
+    with open(args.csv_path, newline="", encoding="utf-8-sig") as csv_file:
+        result = import_users(csv_file, chunk_size=args.chunk_size, workers=args.workers, progress=_print_progress)
+
+    for error in result["errors"]:
+        print(f"✗ line {error['line']} ({error['email'] or '-'}): {error['error']}")
+    print(f"\n✓ Imported {result['imported']} of {result['rows']} rows in "
+          f"{result['elapsed_seconds']:.1f}s ({result['rows_per_second']:.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
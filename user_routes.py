@@ -1,64 +1,133 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
-from models import User, UserRole
-from schemas import User as UserSchema
-from auth import get_current_active_user, require_admin
+from fastapi import APIRouter, Depends, HTTPException, Response, status, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from typing import List, Sequence
+import io
+from database import get_db, get_read_db
+from models import User, UserRole, Enrollment, Attendance
+from schemas import User as UserSchema, UserWithStats, UserImportReport
+from user_import import import_users
+from auth import get_current_active_user, require_admin, Principal
+from cache import invalidate_dashboard_stats
+from pagination import PageParams, page_params, paginate
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-@router.get("/", response_model=List[UserSchema])
+async def with_student_stats(db: AsyncSession, users: Sequence[User]) -> List[UserWithStats]:
+    """Attach enrollment and attendance aggregates for one page of users in a single query"""
+    user_ids = [user.id for user in users]
+    enrollment_counts = (
+        select(Enrollment.student_id, func.count(Enrollment.id).label("enrolled_class_count"))
+        .where(Enrollment.student_id.in_(user_ids), Enrollment.is_active == True)
+        .group_by(Enrollment.student_id)
+        .subquery()
+    )
+    last_attendance = (
+        select(Attendance.student_id, func.max(Attendance.date).label("last_attendance_date"))
+        .where(Attendance.student_id.in_(user_ids))
+        .group_by(Attendance.student_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(
+            User.id,
+            func.coalesce(enrollment_counts.c.enrolled_class_count, 0),
+            last_attendance.c.last_attendance_date
+        )
+        .outerjoin(enrollment_counts, enrollment_counts.c.student_id == User.id)
+        .outerjoin(last_attendance, last_attendance.c.student_id == User.id)
+        .where(User.id.in_(user_ids))
+    )
+    stats = {user_id: (count, last_date) for user_id, count, last_date in result.all()}
+    return [
+        UserWithStats.model_validate(user).model_copy(update={
+            "enrolled_class_count": stats[user.id][0],
+            "last_attendance_date": stats[user.id][1],
+        })
+        for user in users
+    ]
+
+# exclude_unset keeps the stats fields out of responses that did not ask for them
+@router.get("/", response_model=List[UserWithStats], response_model_exclude_unset=True)
 async def get_users(
+    response: Response,
     role: UserRole = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    include_stats: bool = False,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(require_admin)
 ):
     """Get all users (Admin only)"""
-    query = db.query(User).filter(User.is_active == True)
+    query = select(User).where(User.is_active == True)
     
     if role:
-        query = query.filter(User.role == role)
+        query = query.where(User.role == role)
     
-    users = query.all()
+    users = await paginate(db, query, (User.id,), page, response)
+    if include_stats:
+        return await with_student_stats(db, users)
     return users
 
+@router.post("/import", response_model=UserImportReport)
+async def import_users_csv(
+    file: UploadFile = File(...),
+    current_user: Principal = Depends(require_admin)
+):
+    """Bulk import users from a CSV upload (Admin only)"""
+    csv_file = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    # Reading, hashing and inserting all block, so run them off the event loop
+    report = await run_in_threadpool(import_users, csv_file)
+    invalidate_dashboard_stats()
+    return report
+
 @router.get("/teachers", response_model=List[UserSchema])
 async def get_teachers(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """Get all teachers"""
-    teachers = db.query(User).filter(
+    query = select(User).where(
         User.role == UserRole.TEACHER,
         User.is_active == True
-    ).all()
-    return teachers
+    )
+    return await paginate(db, query, (User.id,), page, response)
 
-@router.get("/students", response_model=List[UserSchema])
+@router.get("/students", response_model=List[UserWithStats], response_model_exclude_unset=True)
 async def get_students(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    response: Response,
+    include_stats: bool = False,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """Get all students"""
-    students = db.query(User).filter(
+    if include_stats and current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required for include_stats")
+    
+    query = select(User).where(
         User.role == UserRole.STUDENT,
         User.is_active == True
-    ).all()
+    )
+    students = await paginate(db, query, (User.id,), page, response)
+    if include_stats:
+        return await with_student_stats(db, students)
     return students
 
 @router.get("/{user_id}", response_model=UserSchema)
 async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """Get specific user"""
     # Users can see their own profile, admins can see all
     if current_user.role != UserRole.ADMIN and current_user.id != user_id:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -67,11 +136,11 @@ async def get_user(
 @router.delete("/{user_id}")
 async def deactivate_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin)
 ):
     """Deactivate user (Admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -79,6 +148,8 @@ async def deactivate_user(
         raise HTTPException(status_code=400, detail="Cannot deactivate admin users")
     
     user.is_active = False
-    db.commit()
+    # Committing the change also evicts the user's cached principal (see cache.py)
+    await db.commit()
+    invalidate_dashboard_stats(user_ids=[user.id])
     
     return {"message": "User deactivated successfully"}